@@ -0,0 +1,98 @@
+"""
+Benchmarks for every action: ``parse_args`` end-to-end and the raw parse-path
+(:func:`timeparse.parse` resp. the action's ``__call__``, with and without a
+:class:`timeparse.TimeConfig`) for the input-shapes of tests.py.
+"""
+import argparse
+
+import common
+import timeparse
+import timeparser
+
+timeparser.ENDIAN.set('little')
+timeparser.TimeFormats.config(allow_no_sep=True)
+CONFIG = timeparse.current_config()
+# iso-8601 is only recognized big-endian, like timeparser does
+ISO_CONFIG = timeparse.TimeConfig(endian='big')
+
+
+CASES = [
+    # action, kind of the raw parse-path, cmdline, nargs
+    ('ParseTime', 'time', '--time 104522', None),
+    ('ParseTime', 'time', '--time 23:20:33', None),
+    ('ParseDaytime', 'time', '--daytime 23:20:33', None),
+    ('ParseDate', 'date', '--date 22.4.13', None),
+    ('ParseDate', 'date', '--date 220413', None),
+    ('ParseDate', 'date', '--date 22042013', None),
+    ('ParseDate', 'date', '--date 23', None),
+    ('ParseDate', 'date', '--date 24.Apr.2013', None),
+    ('ParseTimedelta', 'timedelta', '--weeks -20 0 -4', '+'),
+    ('ParseTimedelta', 'timedelta', '--days 20h 12m 4s', '+'),
+    ('ParseDatetime', 'datetime', '--datetime 22.4.13 220316', '+'),
+    ('ParseDatetime', 'datetime', '--datetime 22.4_220316', '+'),
+    ('ParseDatetime', 'datetime', '--datetime 22.4.13 220316', 2),
+    ('ParseTimeOrDatetime', 'datetime', '--datetime 22.4 220316', '+'),
+    ('ParseTimeOrDatetime', 'time', '--datetime 220316', '+'),
+    ('AppendTime', 'time', '--time 23:20:33 --time 22:20', None),
+    ('AppendDaytime', 'time', '--daytime 23:20:33 --daytime 22:20', None),
+    ('AppendDate', 'date', '--date 23.4.13 --date 24.4.13', None),
+    ('AppendTimedelta', 'timedelta', '--delta 1h --delta 2h30m', '+'),
+    ('AppendDatetime', 'datetime', '--datetime 22.4.13 22:03 --datetime 23.4.13 08:00', '+'),
+    ('AppendDatetime', 'datetime', '--datetime 22.4.13 22:03 --datetime 23.4.13 08:00', 2),
+    ('AppendTimeOrDatetime', 'time', '--datetime 220316 --datetime 1303', '+'),
+    ]
+
+ISO_CASES = [
+    ('ParseDatetime', 'datetime', '--datetime 2013-04-24T23:22:00', '+'),
+    ('ParseDatetime', 'datetime', '--datetime 2013-04-24T23:22', None),
+    ]
+
+
+def parse_values(argv):
+    """Return the values of the first option of *argv*."""
+    values = list()
+    for arg in argv[1:]:
+        if arg.startswith('--') and not arg[2:3].isdigit():
+            break
+        values.append(arg)
+    return values
+
+
+def benchmarks():
+    cases = [case + (None,) for case in CASES] + [case + (ISO_CONFIG,) for case in ISO_CASES]
+    for action, kind, cmdline, nargs, config in cases:
+        argv = cmdline.split()
+        option = argv[0]
+        label = '%s[%s]' % (action, ' '.join(argv[1:]))
+        if isinstance(nargs, int):
+            label += '/nargs=%d' % nargs
+
+        parser = argparse.ArgumentParser()
+        cls = getattr(timeparse, action)
+        kwargs = dict(nargs=nargs) if nargs else dict()
+        parser.add_argument(option, action=cls, config=config, **kwargs)
+        yield 'parse_args:' + label, lambda p=parser, a=argv: p.parse_args(a)
+
+        store = parser._option_string_actions[option]
+        values = parse_values(argv)
+        values = values if nargs else values[0]
+        yield ('call:' + label,
+               lambda s=store, p=parser, v=values:
+               s(p, argparse.Namespace(**{s.dest: None}), v))
+
+        # the same action with its own config needn't read the global one
+        parser = argparse.ArgumentParser()
+        parser.add_argument(option, action=cls, config=config or CONFIG, **kwargs)
+        store = parser._option_string_actions[option]
+        yield ('call+config:' + label,
+               lambda s=store, p=parser, v=values:
+               s(p, argparse.Namespace(**{s.dest: None}), v))
+
+        if nargs is None and kind != 'timedelta' and config is None:
+            value = values
+            yield ('parse:%s[%s]' % (kind, value),
+                   lambda k=kind, v=value: timeparse.parse(k, v))
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
@@ -0,0 +1,67 @@
+"""
+Large argument-files with repeated Append*-actions: argparse.ArgumentParser
+calling the actions per occurrence compared to the batched
+:class:`timeparse.TimeArgumentParser` with plain, JSON and NDJSON files.
+"""
+import os
+import json
+import random
+import argparse
+import tempfile
+
+import common
+import timeparse
+import timeparser
+
+timeparser.ENDIAN.set('little')
+
+SIZES = (200, 2000)
+
+
+def argv(size):
+    rnd = random.Random(size)
+    args = list()
+    for i in range(size):
+        if rnd.random() < 0.7:
+            args += ['--at', '%02d:%02d' % (rnd.randrange(24), rnd.choice((0, 15, 30, 45)))]
+        else:
+            args += ['--skip-date', '%d.%d.13' % (rnd.randint(1, 28), rnd.randint(1, 12))]
+    return args
+
+
+def write_files(directory, size):
+    args = argv(size)
+    paths = dict((fmt, os.path.join(directory, 'args%d.%s' % (size, fmt)))
+                 for fmt in ('txt', 'json', 'ndjson'))
+    with open(paths['txt'], 'w') as f:
+        f.write('\n'.join(args))
+    with open(paths['json'], 'w') as f:
+        json.dump(args, f)
+    with open(paths['ndjson'], 'w') as f:
+        for option, value in zip(args[::2], args[1::2]):
+            f.write(json.dumps({option: value}) + '\n')
+    return paths
+
+
+def build(cls):
+    parser = cls(fromfile_prefix_chars='@')
+    parser.add_argument('--at', action=timeparse.AppendDaytime)
+    parser.add_argument('--skip-date', action=timeparse.AppendDate)
+    return parser
+
+
+def benchmarks():
+    directory = tempfile.mkdtemp()
+    plain = build(argparse.ArgumentParser)
+    batched = build(timeparse.TimeArgumentParser)
+    for size in SIZES:
+        paths = write_files(directory, size)
+        yield ('ArgumentParser[%d lines]' % size,
+               lambda p=paths['txt']: plain.parse_args(['@' + p]))
+        for fmt, path in sorted(paths.items()):
+            yield ('TimeArgumentParser[%d lines, %s]' % (size, fmt),
+                   lambda p=path: batched.parse_args(['@' + p]))
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
@@ -0,0 +1,53 @@
+"""
+Rejecting invalid input: the raw parse-path (:func:`timeparse.parse` resp.
+:func:`timeparse.try_parse`) and the action's ``__call__`` (raising or in
+validate_only-mode) for strings that can't be parsed.
+"""
+import argparse
+
+import common
+import timeparse
+import timeparser
+
+timeparser.ENDIAN.set('little')
+
+
+CASES = [
+    # action, kind, invalid value
+    ('ParseTime', 'time', 'foo'),
+    ('ParseTime', 'time', '25:61'),
+    ('ParseTime', 'time', '12:3x'),
+    ('ParseDate', 'date', 'foo'),
+    ('ParseDate', 'date', '99.99.99'),
+    ('ParseDate', 'date', '22.4.13x'),
+    ('ParseDatetime', 'datetime', '22.4.13 25:00'),
+    ('ParseDatetime', 'datetime', 'x 1'),
+    ]
+
+
+def benchmarks():
+    for action, kind, value in CASES:
+        label = '%s[%s]' % (action, value)
+
+        def parse(k=kind, v=value):
+            try: timeparse.parse(k, v)
+            except ValueError: pass
+        yield 'parse:' + label, parse
+        yield 'try_parse:' + label, lambda k=kind, v=value: timeparse.try_parse(k, v)
+
+        parser = argparse.ArgumentParser()
+        store = parser.add_argument('--value', action=getattr(timeparse, action))
+
+        def call(s=store, p=parser, v=value):
+            try: s(p, argparse.Namespace(), v)
+            except argparse.ArgumentError: pass
+        yield 'call:' + label, call
+
+        validate = parser.add_argument(
+            '--validate', action=getattr(timeparse, action), validate_only=True)
+        yield ('validate_only:' + label,
+               lambda s=validate, p=parser, v=value: s(p, argparse.Namespace(), v))
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
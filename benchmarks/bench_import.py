@@ -0,0 +1,86 @@
+"""
+Measure the startup cost of timeparse with ``python -X importtime``.
+
+Two snippets are timed in fresh interpreters:
+
+* lazy:     import timeparse and define a parser with all actions (what a
+            CLI does that is only asked for '--help'),
+* eager:    the same plus loading timeparser and daytime, which is what
+            importing timeparse cost before these were imported lazily.
+
+usage:
+    python benchmarks/bench_import.py [--runs N] [--output results.json]
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFINE = """
+import argparse, timeparse
+parser = argparse.ArgumentParser()
+for i, name in enumerate(a for a in dir(timeparse) if a.startswith(('Parse', 'Append'))):
+    cls = getattr(timeparse, name)
+    if isinstance(cls, type) and issubclass(cls, argparse.Action):
+        parser.add_argument('--arg%d' % i, action=cls)
+"""
+
+SNIPPETS = dict(
+    lazy = DEFINE,
+    eager = DEFINE + "timeparse.timeparser.TODAY; timeparse.Daytime.min\n",
+    )
+
+LINE = re.compile(r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+def importtime(snippet):
+    """
+    Run *snippet* with -X importtime and return the cumulative import-time
+    in microseconds of all top-level imports and of timeparse, timeparser and
+    daytime.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', snippet],
+                          env=env, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr)
+    result = dict(total=0)
+    for match in LINE.finditer(proc.stderr):
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        if len(indent) == 1:
+            result['total'] += cumulative
+        if name in ('timeparse', 'timeparser', 'daytime'):
+            result[name] = result.get(name, 0) + cumulative
+    return result
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=9)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    results = dict()
+    for name, snippet in sorted(SNIPPETS.items()):
+        runs = [importtime(snippet) for i in range(args.runs)]
+        keys = set(k for r in runs for k in r)
+        results[name] = dict((k, median([r.get(k, 0) for r in runs])) for k in keys)
+        print('%-6s %s' % (name, '  '.join('%s=%dus' % i for i in sorted(results[name].items()))))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Epoch-representations of parsed values: the actions with as_='epoch' resp.
+as_='epoch_ns', which compute them from the parsed fields, compared to
+parsing the objects followed by a separate conversion-step.
+"""
+import argparse
+import datetime
+
+import common
+import timeparse
+import timeparser
+
+timeparser.ENDIAN.set('little')
+# iso-8601 is only recognized big-endian, like timeparser does
+CONFIG = timeparse.TimeConfig(endian='big')
+UTC = datetime.timezone.utc
+
+
+def seconds(obj):
+    if isinstance(obj, datetime.datetime):
+        return obj.replace(tzinfo=obj.tzinfo or UTC).timestamp()
+    if isinstance(obj, datetime.date):
+        return (obj.toordinal() - 719163) * 86400.0
+    return obj.hour * 3600.0 + obj.minute * 60 + obj.second + obj.microsecond / 10**6
+
+
+CASES = [
+    # action, nargs, cmdline
+    ('ParseTime', None, '23:22'),
+    ('ParseDate', None, '24.4.13'),
+    ('ParseDatetime', None, '2013-04-24T23:22:00'),
+    ('ParseDatetime', None, '2013-04-24T23:22:00+02:00'),
+    ('ParseDatetime', 2, '24.4.13 23:22'),
+    ]
+
+
+def benchmarks():
+    for action, nargs, cmdline in CASES:
+        values = cmdline.split() if nargs else cmdline
+        label = '%s[%s]' % (action, cmdline)
+        for as_ in ('epoch', 'epoch_ns'):
+            parser = argparse.ArgumentParser()
+            store = parser.add_argument('--value', action=getattr(timeparse, action),
+                                        nargs=nargs, config=CONFIG, as_=as_)
+            yield ('as_=%s:%s' % (as_, label),
+                   lambda s=store, p=parser, v=values: s(p, argparse.Namespace(), v))
+
+        parser = argparse.ArgumentParser()
+        store = parser.add_argument('--value', action=getattr(timeparse, action),
+                                    nargs=nargs, config=CONFIG)
+
+        def converted(s=store, p=parser, v=values):
+            namespace = argparse.Namespace()
+            s(p, namespace, v)
+            namespace.value = seconds(namespace.value)
+        yield 'objects+convert:' + label, converted
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
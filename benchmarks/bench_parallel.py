@@ -0,0 +1,31 @@
+"""
+Scaling of timeparse.parse_parallel with 1, 2, 4 and 8 workers.
+"""
+import random
+
+import common
+import timeparse
+import timeparser
+
+timeparser.ENDIAN.set('little')
+
+SIZE = 200000
+
+
+def strings(size=SIZE):
+    random.seed(0)
+    return ['%d.%d.%d %02d:%02d' % (random.randint(1, 28), random.randint(1, 12),
+                                   random.randint(1990, 2030), random.randint(0, 23),
+                                   random.randint(0, 59))
+            for i in range(size)]
+
+
+def benchmarks():
+    values = strings()
+    for workers in (1, 2, 4, 8):
+        yield ('parse_parallel:datetime[%d strings, %d workers]' % (SIZE, workers),
+               lambda w=workers: timeparse.parse_parallel('datetime', values, workers=w))
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
@@ -0,0 +1,31 @@
+"""
+Overhead of the instrumentation (s. timeparse.enable_stats) on an action-call.
+"""
+import argparse
+
+import common
+import timeparse
+
+
+def benchmarks():
+    parser = argparse.ArgumentParser()
+    action = parser.add_argument('--time', action=timeparse.ParseTime)
+
+    def call():
+        action(parser, argparse.Namespace(), '23:20:33')
+
+    def enabled(on):
+        def func():
+            timeparse.enable_stats(on)
+            call()
+        return func
+
+    yield 'call:instrumentation-off', enabled(False)
+    yield 'call:instrumentation-on', enabled(True)
+    yield 'call:observer', lambda: (timeparse.set_observer(lambda e: None), call())
+    timeparse.set_observer(None)
+    timeparse.enable_stats(False)
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
@@ -0,0 +1,63 @@
+"""
+Timezone-aware datetimes: parsing the timezone along with the value resp.
+attaching a default_tz, compared to naive parsing followed by a separate
+localize-step, which looks up the timezone for each value.
+"""
+import argparse
+import datetime
+
+import common
+import timeparse
+import timeparser
+
+timeparser.ENDIAN.set('little')
+# iso-8601 is only recognized big-endian, like timeparser does
+CONFIG = timeparse.TimeConfig(endian='big')
+
+try:
+    import zoneinfo
+except ImportError:
+    zoneinfo = None
+
+
+def offset(string):
+    sign, hours, minutes = string[0], int(string[1:3]), int(string[4:6])
+    delta = datetime.timedelta(hours=hours, minutes=minutes)
+    return datetime.timezone(-delta if sign == '-' else delta)
+
+
+CASES = [
+    # name, aware cmdline, naive cmdline, tz of the localize-step
+    ('offset', '2013-04-24T23:22:00+02:00', '2013-04-24T23:22:00', lambda: offset('+02:00')),
+    ('Z', '2013-04-24T23:22:00Z', '2013-04-24T23:22:00', lambda: datetime.timezone.utc),
+    ('offset', '24.4.13 23:22+02:00', '24.4.13 23:22', lambda: offset('+02:00')),
+    ]
+if zoneinfo is not None:
+    CASES.append(('name', '24.4.13 23:22 Europe/Berlin', '24.4.13 23:22',
+                  lambda: zoneinfo.ZoneInfo('Europe/Berlin')))
+
+
+def benchmarks():
+    for name, aware, naive, localize in CASES:
+        parser = argparse.ArgumentParser()
+        store = parser.add_argument('--aware', action=timeparse.ParseDatetime,
+                                   nargs='+', config=CONFIG)
+        yield ('aware:%s[%s]' % (name, aware),
+               lambda s=store, p=parser, v=aware.split(): s(p, argparse.Namespace(), v))
+
+        def localized(s=store, p=parser, v=naive.split(), tz=localize):
+            namespace = argparse.Namespace()
+            s(p, namespace, v)
+            namespace.aware = namespace.aware.replace(tzinfo=tz())
+        yield 'naive+localize:%s[%s]' % (name, naive), localized
+
+    default = 'Europe/Berlin' if zoneinfo is not None else '+02:00'
+    parser = argparse.ArgumentParser()
+    store = parser.add_argument('--default', action=timeparse.ParseDatetime,
+                                nargs='+', config=CONFIG, default_tz=default)
+    yield ('default_tz:%s[24.4.13 23:22]' % default,
+           lambda s=store, p=parser: s(p, argparse.Namespace(), ['24.4.13', '23:22']))
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
@@ -0,0 +1,102 @@
+"""
+Helpers shared by the benchmark-modules.
+
+A benchmark-module is a file benchmarks/bench_*.py with a function
+``benchmarks()`` yielding tuples of a name and a callable without arguments.
+:func:`measure` times such a callable with :mod:`timeit` and :func:`main`
+runs the benchmarks of a module from the command-line.
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import platform
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """
+    Time *func* and return a dict with the minimal and the median time per
+    call in microseconds as well as the number of loops per run.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time / 10:
+        number *= 10
+    runs = sorted(t / number * 1e6 for t in timer.repeat(repeat, number))
+    return dict(min=runs[0], median=runs[len(runs) // 2], loops=number)
+
+
+def metadata():
+    import timeparse
+    return dict(
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        timeparse=timeparse.__version__,
+        date=time.strftime('%Y-%m-%dT%H:%M:%S'),
+        )
+
+
+def run(benchmarks, pattern=None, repeat=5, min_time=0.2, out=sys.stdout):
+    """
+    Run all (name, func)-tuples of *benchmarks*, whose name contains
+    *pattern*, and return the results as dict.
+    """
+    results = dict()
+    for name, func in benchmarks:
+        if pattern and pattern not in name:
+            continue
+        results[name] = result = measure(func, repeat, min_time)
+        out.write('%-60s %10.2f us  (median %.2f us)\n'
+                  % (name, result['min'], result['median']))
+        out.flush()
+    return results
+
+
+def compare(base, results, out=sys.stdout):
+    """
+    Write the ratio of the minimal times of *results* to those of *base*.
+    """
+    for name in sorted(set(base) & set(results)):
+        ratio = results[name]['min'] / base[name]['min']
+        out.write('%-60s %10.2f us -> %10.2f us  %6.2fx\n'
+                  % (name, base[name]['min'], results[name]['min'], 1 / ratio))
+
+
+def save(path, results):
+    with open(path, 'w') as f:
+        json.dump(dict(meta=metadata(), benchmarks=results), f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)['benchmarks']
+
+
+def argument_parser(description=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-k', '--filter', help='run only benchmarks containing this string')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='minimal seconds per run')
+    parser.add_argument('-o', '--output', help='write the results as JSON to this file')
+    parser.add_argument('-c', '--compare', help='compare with the results of this JSON-file')
+    return parser
+
+
+def main(benchmarks, description=None, argv=None):
+    """
+    Command-line interface for running *benchmarks*.
+    """
+    args = argument_parser(description).parse_args(argv)
+    results = run(benchmarks, args.filter, args.repeat, args.min_time)
+    if args.output:
+        save(args.output, results)
+    if args.compare:
+        compare(load(args.compare), results)
+    return results
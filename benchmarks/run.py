@@ -0,0 +1,28 @@
+"""
+Run the benchmarks of all benchmark-modules (benchmarks/bench_*.py defining
+``benchmarks()``).
+
+usage:
+    python benchmarks/run.py [-k FILTER] [-o results.json] [-c baseline.json]
+
+Store the results of a run with -o and compare later runs against them with -c
+to spot regressions.
+"""
+import os
+import glob
+import importlib
+
+import common
+
+
+def benchmarks():
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(here, 'bench_*.py'))):
+        module = importlib.import_module(os.path.basename(path)[:-3])
+        if hasattr(module, 'benchmarks'):
+            for name, func in module.benchmarks():
+                yield '%s.%s' % (module.__name__[6:], name), func
+
+
+if __name__ == '__main__':
+    common.main(benchmarks(), __doc__.strip().split('\n')[0])
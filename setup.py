@@ -1,5 +1,5 @@
 import os
-from distutils.core import setup
+from setuptools import setup
 
 #import timeparse
 
@@ -16,6 +16,7 @@ setup(
     long_description = open('README.rst').read() if os.path.isfile('README.rst') else str(),
     py_modules = ["timeparse"],
     install_requires = ['timeparser', 'daytime'],
+    python_requires = '>=3.7',
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
@@ -23,7 +24,9 @@ setup(
         'Operating System :: MacOS :: MacOS X',
         'Operating System :: Microsoft :: Windows',
         'Operating System :: POSIX :: Linux',
-        'Programming Language :: Python :: 2.7',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
     ],
     license='GPL',
     keywords='parser parse datetime time strings',
@@ -1,10 +1,29 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import subprocess
 import unittest
 import datetime
+import collections.abc
 import timeparse
 import argparse
 import timeparser
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import zoneinfo
+    zoneinfo.ZoneInfo('Europe/Berlin')
+except (ImportError, KeyError):
+    zoneinfo = None
+
 from argparse import ArgumentError
+from daytime import Daytime
 
 timeparser.ENDIAN.set('little')
 
@@ -28,6 +47,8 @@ class TestTimeParser(unittest.TestCase):
             nargs='+',
             )
         self.assertEqual(datetime.timedelta(days=-20, minutes=-4), self.parser.parse_args('--plus -20 0 -4'.split()).plus)
+        self.assertEqual(datetime.timedelta(days=1, hours=2), self.parser.parse_args('--plus P1DT2H'.split()).plus)
+        self.assertRaises(SystemExit, self.parser.parse_args, ('--plus P1Y'.split()))
 
     def test_ParseTime(self):
         self.parser.add_argument(
@@ -68,6 +89,12 @@ class TestTimeParser(unittest.TestCase):
             datetime.datetime(self.this_year, 4, 22, 22, 3, 16),
             self.parser.parse_args('--datetime 22.4 220316'.split()).datetime
             )
+        self.parser.add_argument('--pair', action=timeparse.ParseDatetime, nargs=2)
+        self.parser.add_argument('--iso', action=timeparse.ParseDatetime,
+                                 config=timeparse.TimeConfig(endian='big'))
+        args = self.parser.parse_args('--pair 22.4 220316 --iso 2013-04-24T23:22:00'.split())
+        self.assertEqual(datetime.datetime(self.this_year, 4, 22, 22, 3, 16), args.pair)
+        self.assertEqual(datetime.datetime(2013, 4, 24, 23, 22), args.iso)
 
     def test_ParseTimeOrDatetime(self):
         self.parser.add_argument(
@@ -95,6 +122,694 @@ class TestTimeParser(unittest.TestCase):
             self.parser.parse_args('--datetime 220316 --datetime 1303'.split()).datetime
             )
 
+    def test_cache(self):
+        self.parser.add_argument(
+            '--time',
+            action=timeparse.ParseTime,
+            )
+        timeparse.cache_clear()
+        timeparser.TimeFormats.config(allow_no_sep=True)
+        self.parser.parse_args('--time 104522'.split())
+        self.parser.parse_args('--time 104522'.split())
+        info = timeparse.cache_info()
+        self.assertEqual((1, 1, 1), (info.hits, info.misses, info.currsize))
+
+        timeparser.TimeFormats.config(allow_no_sep=False)
+        self.assertRaises(SystemExit, self.parser.parse_args, ('--time 104522'.split()))
+        self.assertEqual(0, timeparse.cache_info().currsize)
+        timeparser.TimeFormats.config(allow_no_sep=True)
+
+    def test_fastpath(self):
+        timeparser.TimeFormats.config(allow_no_sep=True)
+        for kind, string in [('time', '23:22'), ('time', '220316'),
+                             ('date', '22.4.13'), ('date', '22042013')]:
+            self.assertEqual(
+                getattr(timeparser, timeparse.PARSERS[kind])(string),
+                timeparse.FASTPATHS[kind](string)
+                )
+        self.assertEqual(None, timeparse.FASTPATHS['time']('24:00'))
+
+        # iso-dates are recognized only where timeparser would parse them
+        big = timeparse.TimeConfig(endian='big')
+        self.assertEqual(datetime.date(2013, 4, 24), timeparse.FASTPATHS['date'](
+            '2013-04-24', big))
+        self.assertEqual(None, timeparse.FASTPATHS['date']('2013-04-24'))
+        for options in [dict(seps=['.']), dict(try_hard=True)]:
+            config = timeparse.TimeConfig(endian='big', date=options)
+            self.assertEqual(None, timeparse.FASTPATHS['date']('2013-04-24', config))
+            self.assertEqual(None, timeparse.FASTPATHS['datetime']('2013-04-24T23:22', config))
+        self.assertEqual(None, timeparse.FASTPATHS['datetime']('2013-04-24T23:22:00'))
+
+        self.parser.add_argument(
+            '--datetime',
+            action=timeparse.ParseDatetime,
+            config=big,
+            )
+        self.assertEqual(
+            datetime.datetime(2013, 4, 24, 23, 22),
+            self.parser.parse_args('--datetime 2013-04-24T23:22:00'.split()).datetime
+            )
+        self.assertRaises(SystemExit, self.parser.parse_args,
+                          '--datetime 2013-04-24T23:22:00.5'.split())
+
+    def test_parse_many(self):
+        self.parser.add_argument(
+            '--date',
+            action=timeparse.ParseDate,
+            nargs='+',
+            )
+        values = ['22.4.13', '23.4.13', '24 Apr 2013', '220413']
+        self.assertEqual(
+            self.parser.parse_args(['--date'] + values).date,
+            timeparse.parse_many('date', values)
+            )
+        self.assertRaises(ValueError, timeparse.parse_many, 'date', ['22.4.13', 'foo'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_parse_many_as_array(self):
+        array = timeparse.parse_many('datetime', ['24.4.13 23:22'], as_array=True)
+        self.assertEqual(numpy.datetime64('2013-04-24T23:22'), array[0])
+
+    def test_ParseDatetimeStream(self):
+        self.parser.add_argument(
+            '--datetimes',
+            action=timeparse.ParseDatetimeStream,
+            errors='collect',
+            config=timeparse.TimeConfig(endian='big'),
+            )
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write('13.4.22 220316\nfoo\n\n2013-04-24T23:22:00\n')
+        try:
+            stream = self.parser.parse_args(['--datetimes', '@' + path]).datetimes
+            self.assertEqual(
+                [datetime.datetime(2013, 4, 22, 22, 3, 16),
+                 datetime.datetime(2013, 4, 24, 23, 22)],
+                list(stream)
+                )
+            self.assertEqual([(2, 'foo\n')], stream.failures)
+            self.assertTrue(stream.lines.closed)
+        finally:
+            os.remove(path)
+        self.assertRaises(SystemExit, self.parser.parse_args, ['--datetimes', '@' + path])
+
+    def test_lock_format(self):
+        action = self.parser.add_argument(
+            '--date',
+            action=timeparse.AppendDate,
+            lock_format=True,
+            )
+        self.assertEqual(
+            [datetime.date(2013, 4, 24), datetime.date(2013, 4, 25)],
+            self.parser.parse_args('--date 24.Apr.2013 --date 25.Apr.2013'.split()).date
+            )
+        self.assertEqual('%d.%b.%Y', action.format_lock.formats['date'])
+        for action in [timeparse.AppendTimedelta, timeparse.ParseTimeStream]:
+            self.assertRaises(ValueError, self.parser.add_argument, '--foo',
+                              action=action, lock_format=True)
+
+    def test_compact_container(self):
+        self.parser.add_argument(
+            '--datetime',
+            action=timeparse.AppendDatetime,
+            container='compact',
+            nargs='+',
+            )
+        self.parser.add_argument(
+            '--time',
+            action=timeparse.AppendTime,
+            container='compact',
+            default=[datetime.time(1)],
+            )
+        args = self.parser.parse_args(
+            '--datetime 24.4.13 23:22 --datetime 1.1.1900 12:00 --time 3:22:12'.split())
+        self.assertIsInstance(args.datetime, timeparse.CompactTimes)
+        self.assertEqual(
+            [datetime.datetime(2013, 4, 24, 23, 22), datetime.datetime(1900, 1, 1, 12)],
+            args.datetime
+            )
+        self.assertEqual(datetime.datetime(1900, 1, 1, 12), args.datetime[-1])
+        self.assertIsInstance(args.datetime, collections.abc.Sequence)
+        self.assertEqual(1, args.datetime.index(datetime.datetime(1900, 1, 1, 12)))
+        self.assertEqual(1, args.datetime.count(datetime.datetime(2013, 4, 24, 23, 22)))
+        self.assertEqual(
+            [datetime.time(1), datetime.time(3, 22, 12)],
+            list(args.time)
+            )
+        self.assertRaises(
+            ValueError,
+            self.parser.add_argument,
+            '--any',
+            action=timeparse.AppendTimeOrDatetime,
+            container='compact'
+            )
+        if numpy is not None:
+            self.assertEqual(
+                numpy.datetime64('2013-04-24T23:22'),
+                args.datetime.to_numpy()[0]
+                )
+
+    def test_accumulator(self):
+        default = []
+        self.parser.add_argument(
+            '--date',
+            action=timeparse.AppendDate,
+            default=default,
+            nargs='+',
+            each=True,
+            order='unique',
+            )
+        self.parser.add_argument(
+            '--datetime',
+            action=timeparse.AppendDatetime,
+            container='compact',
+            order='sorted',
+            nargs='+',
+            )
+        args = self.parser.parse_args(
+            '--date 24.4.13 22.4.13 --date 24.4.13 --date 23.4.13 '
+            '--datetime 24.4.13 10:00 --datetime 23.4.13 10:00'.split())
+        self.assertEqual(
+            [datetime.date(2013, 4, 22), datetime.date(2013, 4, 23), datetime.date(2013, 4, 24)],
+            args.date
+            )
+        self.assertEqual([], default)
+        self.assertEqual(
+            [datetime.datetime(2013, 4, 23, 10), datetime.datetime(2013, 4, 24, 10)],
+            args.datetime
+            )
+        self.assertEqual([], self.parser.parse_args([]).date)
+        self.assertRaises(
+            ValueError,
+            self.parser.add_argument,
+            '--any',
+            action=timeparse.AppendTimeOrDatetime,
+            order='sorted'
+            )
+
+    def test_TimeIndex(self):
+        self.parser.add_argument(
+            '--at',
+            action=timeparse.AppendDatetime,
+            container='index',
+            nargs='+',
+            )
+        self.parser.add_argument(
+            '--time',
+            action=timeparse.AppendTime,
+            container='index',
+            )
+        args = self.parser.parse_args(
+            '--at 24.4.13 10:00 --at 22.4.13 10:00 --at 23.4.13 10:00 '
+            '--time 8:00 --time 23:00 --time 1:00'.split())
+        at = args.at
+        self.assertIsInstance(at, timeparse.TimeIndex)
+        self.assertEqual(
+            [datetime.datetime(2013, 4, 23, 10), datetime.datetime(2013, 4, 24, 10)],
+            at.between(datetime.datetime(2013, 4, 23), datetime.datetime(2013, 4, 24, 10))
+            )
+        self.assertEqual(datetime.datetime(2013, 4, 23, 10), at.nearest(datetime.datetime(2013, 4, 23)))
+        self.assertEqual(datetime.datetime(2013, 4, 23, 10), at.next_after(datetime.datetime(2013, 4, 22, 10)))
+        self.assertIsNone(at.next_after(datetime.datetime(2013, 4, 24, 10)))
+        self.assertIn(datetime.datetime(2013, 4, 22, 10), at)
+        self.assertEqual(1, at.index(datetime.datetime(2013, 4, 23, 10)))
+        self.assertEqual(0, at.count(datetime.datetime(2013, 4, 23)))
+        self.assertRaises(ValueError, at.index, datetime.datetime(2013, 4, 23))
+        times = args.time
+        self.assertEqual([datetime.time(1), datetime.time(8), datetime.time(23)], times)
+        self.assertEqual(
+            [datetime.time(23), datetime.time(1)],
+            times.between(datetime.time(22), datetime.time(2))
+            )
+        self.assertEqual(datetime.time(1), times.next_after(datetime.time(23, 30)))
+        self.assertEqual(datetime.time(1), times.nearest(datetime.time(0, 15)))
+        self.assertEqual(datetime.time(23), times.nearest(datetime.time(23, 50)))
+
+    def test_ParseDatetimeRange(self):
+        self.parser.add_argument(
+            '--window',
+            nargs='+',
+            action=timeparse.ParseDatetimeRange,
+            )
+        self.parser.add_argument(
+            '--every',
+            nargs='+',
+            action=timeparse.ParseRecurrence,
+            )
+        window = self.parser.parse_args(
+            '--window 22.4.13 08:00 .. 23.4.13 18:00 every 15m'.split()).window
+        self.assertEqual(137, len(window))
+        self.assertEqual(datetime.datetime(2013, 4, 22, 8, 15), window[1])
+        self.assertEqual(datetime.datetime(2013, 4, 23, 18), window[-1])
+        self.assertIn(datetime.datetime(2013, 4, 23, 12, 45), window)
+        self.assertNotIn(datetime.datetime(2013, 4, 23, 12, 40), window)
+        self.assertEqual(53, window.index(datetime.datetime(2013, 4, 22, 21, 15)))
+        self.assertEqual(list(window)[10:20:3], list(window[10:20:3]))
+        self.assertEqual(list(window)[::-1], list(window[::-1]))
+        days = self.parser.parse_args('--window 22.4.13 08:00 .. 24.4.13 07:00'.split()).window
+        self.assertEqual(2, len(days))
+        every = self.parser.parse_args('--every 22.4.13 08:00 every 1s'.split()).every
+        self.assertIn(datetime.datetime(2014, 4, 22, 8), every)
+        self.assertEqual(datetime.datetime(2013, 4, 23, 8), every[86400])
+        self.assertRaises(TypeError, len, every)
+        times = self.parser.parse_args('--every 22.4.13 08:00 every 2h times 3'.split()).every
+        self.assertEqual(datetime.datetime(2013, 4, 22, 12), times[-1])
+        self.assertRaises(SystemExit, self.parser.parse_args, '--window 22.4.13 08:00'.split())
+        self.assertRaises(SystemExit, self.parser.parse_args, '--every 22.4.13 08:00 every 0'.split())
+
+    def test_disk_cache(self):
+        directory = tempfile.mkdtemp()
+        disk = timeparse.DiskCache(os.path.join(directory, 'cache', 'timeparse.db'), size=2)
+        timeparse._disk = disk
+        init = timeparser.DateFormats.__init__
+        try:
+            timeparse._formats.clear()
+            formats = timeparse.formats('date', '22.4.13')
+            config = timeparse.config_key()
+            self.assertEqual(formats, disk.get(config, 'date', '00.0.00'))
+            timeparse._formats.clear()
+            timeparser.DateFormats.__init__ = None
+            self.assertEqual(formats, timeparse.formats('date', '23.5.14'))
+            self.assertEqual(datetime.date(2013, 4, 24), timeparse.parse('date', '24.4.13'))
+            timeparser.DateFormats.__init__ = init
+            timeparse.formats('date', '24.4.2013')
+            timeparse.formats('date', '24 4 2013')
+            self.assertIsNone(disk.get(config, 'date', '00.0.00'))
+            self.assertEqual(2, len(disk.execute('SELECT * FROM formats')))
+        finally:
+            timeparser.DateFormats.__init__ = init
+            timeparse._disk = False
+            timeparse._formats.clear()
+            disk.db.close()
+            os.remove(disk.path)
+
+    def test_fits(self):
+        self.assertTrue(timeparse.fits('%d.%m.%y', '00.0.00'))
+        self.assertTrue(timeparse.fits('%d.%b %Y', '0.apr  0000'))
+        self.assertTrue(timeparse.fits('%H%M%S', '00000'))
+        self.assertFalse(timeparse.fits('%H%M%S', '0000000'))
+        self.assertFalse(timeparse.fits('%d%b', 'foo'))
+        self.assertFalse(timeparse.fits('%H:%M', '00:0x'))
+        self.assertTrue(timeparse.fits('%z', 'foo'))
+        self.assertEqual((), timeparse.formats('date', 'foo'))
+        self.assertRaises(ValueError, timeparse.parse, 'date', 'foo')
+
+    def test_try_parse(self):
+        self.assertEqual(datetime.date(2013, 4, 24), timeparse.try_parse('date', '24.Apr.2013'))
+        self.assertEqual(datetime.timedelta(hours=2), timeparse.try_parse('timedelta', '2h'))
+        for kind in ('time', 'daytime', 'date', 'datetime', 'timedelta'):
+            self.assertIsNone(timeparse.try_parse(kind, 'foo'))
+        self.assertIsNone(timeparse.try_parse('date', '31.2.13'))
+        self.assertEqual(
+            (datetime.time(22, 3), '%I:%M %p'),
+            timeparse.find('time', '10:03 pm', ('%H:%M', '%I:%M %p')))
+
+    def test_validate_only(self):
+        self.parser.add_argument(
+            '--date',
+            action=timeparse.ParseDate,
+            validate_only=True,
+            )
+        self.parser.add_argument(
+            '--time',
+            action=timeparse.AppendTime,
+            validate_only=True,
+            )
+        args = self.parser.parse_args('--date 31.2.13 --time 25:00 --time 12:00'.split())
+        self.assertIsNone(args.date)
+        self.assertEqual([datetime.time(12)], args.time)
+        self.assertEqual([('date', '31.2.13'), ('time', '25:00')], args.invalid_values)
+        self.assertFalse(hasattr(self.parser.parse_args([]), 'invalid_values'))
+
+    def test_TimeConfig(self):
+        big = timeparse.TimeConfig(endian='big', today=datetime.date(2000, 1, 1))
+        middle = timeparse.TimeConfig(endian='middle', date=dict(SEPS=['/']))
+        self.assertIs(big, timeparse.TimeConfig(endian='big', today=(2000, 1, 1)))
+        self.assertIs(middle, timeparse.TimeConfig.from_key(middle.key))
+        self.assertRaises(AttributeError, setattr, big, 'endian', None)
+        self.assertRaises(ValueError, self.parser.add_argument, '--foo',
+                          action=timeparse.ParseDate, config=middle.key)
+        self.parser.add_argument('--big', action=timeparse.ParseDate, config=big)
+        self.parser.add_argument('--middle', action=timeparse.AppendDate, config=middle)
+        self.parser.add_argument('--date', action=timeparse.ParseDate)
+        key = timeparse.config_key()
+        results = list()
+        def parse():
+            for i in range(200):
+                args = self.parser.parse_args(
+                    '--big 13/4/22 --middle 4/22/13 --middle 2/3 --date 22.4.13'.split())
+                results.append((args.big, args.middle, args.date))
+        threads = [threading.Thread(target=parse) for i in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(key, timeparse.config_key())
+        date = datetime.date(2013, 4, 22)
+        this_year = datetime.date(self.this_year, 2, 3)
+        self.assertEqual(800, len(results))
+        self.assertTrue(all(r == (date, [date, this_year], date) for r in results))
+        self.assertEqual(datetime.date(2000, 2, 3), self.parser.parse_args(
+            '--big 2/3'.split()).big)
+        self.assertRaises(SystemExit, self.parser.parse_args, '--middle 4.22.13'.split())
+        self.assertIs(middle, timeparse.TimeConfig(endian='middle', date=dict(seps=['/'])))
+        self.assertRaises(TypeError, timeparse.TimeConfig, date=dict(sep=['/']))
+        self.assertRaises(TypeError, timeparse.TimeConfig, time=dict(month_code=[True]))
+        seps = timeparser.DateFormats.SEPS
+        endian = timeparser.ENDIAN._key
+        names = timeparse.TimeConfig(date=dict(allow_month_name=False, seps=['.']))
+        self.assertEqual((True, False, False), names.date.MONTH_CODE)
+        self.assertEqual((), names.formats('date', '22 Apr 2013'))
+        self.assertTrue(timeparse.formats('date', '22 Apr 2013'))
+        self.assertTrue(middle.formats('datetime', '4/23/13 12:30'))
+        self.assertIs(seps, timeparser.DateFormats.SEPS)
+        self.assertEqual(endian, timeparser.ENDIAN._key)
+        self.assertEqual(key, timeparse.config_key())
+        timeparse.apply_config(middle.key)
+        self.assertIs(seps, timeparser.DateFormats.SEPS)
+        self.assertEqual(['/'], seps)
+        timeparse.apply_config(key)
+        self.assertIsNot(timeparser, timeparse._formats_timeparser())
+        timeparse.cache_clear()
+        self.parser.parse_args('--big 13/4/22 --date 22.4.13'.split())
+        self.assertEqual(2, timeparse.cache_info().currsize)
+        timeparser.TODAY.set(2001, 1, 1)
+        timeparse.try_parse('time', '12:00')
+        # only the value parsed with the global configuration is dropped
+        self.assertEqual(2, timeparse.cache_info().currsize)
+        timeparse.apply_config(key)
+
+    def test_timezones(self):
+        big = timeparse.TimeConfig(endian='big')
+        self.parser.add_argument('--datetime', action=timeparse.ParseDatetime, nargs='+')
+        self.parser.add_argument('--iso', action=timeparse.ParseDatetime, nargs='+',
+                                 dest='datetime', config=big)
+        self.parser.add_argument('--pair', action=timeparse.AppendDatetime, nargs=2,
+                                 default_tz='+01:00')
+        self.assertRaises(ValueError, self.parser.add_argument, '--foo',
+                          action=timeparse.ParseDatetime, default_tz='Foo/Bar')
+        self.assertRaises(ValueError, self.parser.add_argument, '--day',
+                          action=timeparse.ParseDate, default_tz='UTC')
+        self.parser.add_argument('--today', action=timeparse.ParseDate, default_tz='UTC',
+                                 relative=True)
+        utc = datetime.timezone.utc
+        plus2 = datetime.timezone(datetime.timedelta(hours=2))
+        for cmdline, tz in [('--iso 2013-04-24T23:22:00Z', utc),
+                            ('--iso 2013-04-24T23:22:00+02:00', plus2),
+                            ('--datetime 24.4.13 23:22+0200', plus2),
+                            ('--datetime 24.4.13 23:22 UTC', utc),
+                            ('--datetime 24.4.13 23:22', None)]:
+            args = self.parser.parse_args(cmdline.split())
+            self.assertEqual(datetime.datetime(2013, 4, 24, 23, 22, tzinfo=tz), args.datetime)
+            self.assertEqual(tz, args.datetime.tzinfo)
+        self.assertIs(timeparse.resolve_tz('+02'), timeparse.resolve_tz('+0200'))
+        args = self.parser.parse_args('--pair 24.4.13 23:22 --pair 24.4.13 23:22Z'.split())
+        self.assertEqual([datetime.timedelta(hours=1), datetime.timedelta(0)],
+                         [d.utcoffset() for d in args.pair])
+        self.assertRaises(SystemExit, self.parser.parse_args,
+                          '--datetime 24.4.13 23:22+25:00'.split())
+        self.parser.add_argument('--two', action=timeparse.ParseDatetime, nargs=2, config=big)
+        args = self.parser.parse_args('--two 2013-04-24T23:22 +02:00'.split())
+        self.assertEqual(datetime.datetime(2013, 4, 24, 23, 22, tzinfo=plus2), args.two)
+        if zoneinfo is not None:
+            args = self.parser.parse_args('--datetime 24.4.13 23:22 Europe/Berlin'.split())
+            self.assertEqual(zoneinfo.ZoneInfo('Europe/Berlin'), args.datetime.tzinfo)
+            self.assertEqual(plus2.utcoffset(None), args.datetime.utcoffset())
+            args = self.parser.parse_args('--two 2013-04-24T23:22 Europe/Berlin'.split())
+            self.assertEqual(zoneinfo.ZoneInfo('Europe/Berlin'), args.two.tzinfo)
+
+        self.parser.add_argument('--compact', action=timeparse.AppendDatetime,
+                                 container='compact_utc', config=big)
+        self.parser.add_argument('--naive', action=timeparse.AppendDatetime,
+                                 container='compact', config=big)
+        self.assertRaises(SystemExit, self.parser.parse_args,
+                          '--naive 2013-04-24T23:22+02:00'.split())
+        self.assertRaises(ValueError, timeparse.CompactTimes, 'datetime',
+                          [datetime.datetime(2013, 4, 24, tzinfo=plus2)])
+        self.parser.add_argument('--sorted', action=timeparse.AppendDatetime, order='sorted',
+                                 config=big)
+        args = self.parser.parse_args('--compact 2013-04-24T23:22+02:00'.split())
+        self.assertEqual([datetime.datetime(2013, 4, 24, 21, 22)], list(args.compact))
+        self.assertRaises(SystemExit, self.parser.parse_args,
+                          '--sorted 2013-04-24T23:22Z --sorted 2013-04-24T23:22'.split())
+        action = self.parser.add_argument('--mixed', action=timeparse.AppendDatetime,
+                                          order='sorted', config=big)
+        namespace = argparse.Namespace(mixed=None)
+        action(self.parser, namespace, '2013-04-24T23:22Z')
+        with self.assertRaisesRegex(ArgumentError, 'cannot mix naive and aware'):
+            action(self.parser, namespace, '2013-04-24T23:22')
+
+    def test_relative(self):
+        now = datetime.datetime(2013, 4, 24, 23, 22)
+        for string, kind, value in [
+                ('now', 'datetime', now),
+                ('-2h30m', 'datetime', datetime.datetime(2013, 4, 24, 20, 52)),
+                ('3 days ago', 'date', datetime.date(2013, 4, 21)),
+                ('yesterday 18:00', 'datetime', datetime.datetime(2013, 4, 23, 18)),
+                ('tomorrow noon +30m', 'datetime', datetime.datetime(2013, 4, 25, 12, 30)),
+                ('last monday', 'datetime', datetime.datetime(2013, 4, 22)),
+                ('last wed', 'date', datetime.date(2013, 4, 17)),
+                ('next Wednesday', 'date', datetime.date(2013, 5, 1)),
+                ('+1h', 'time', datetime.time(0, 22)),
+                ]:
+            self.assertEqual(value, timeparse.parse_relative(kind, string, now))
+        for string, kind in [('last', 'date'), ('monday monday', 'date'), ('2 ago', 'date'),
+                             ('25:00', 'time'), ('monday', 'time'), ('today 18:00', 'date'),
+                             ('24.4.13', 'date'), ('foo', 'datetime')]:
+            self.assertIsNone(timeparse.parse_relative(kind, string, now))
+
+        self.parser.add_argument('--since', action=timeparse.ParseDatetime, nargs='+',
+                                 relative=True)
+        self.parser.add_argument('--at', action=timeparse.AppendDatetime, relative=True,
+                                 default_tz='UTC')
+        self.parser.add_argument('--date', action=timeparse.ParseDate, relative=True)
+        args = self.parser.parse_args('--since now --at now --at=-1d --date yesterday'.split())
+        self.assertEqual(datetime.timedelta(days=1), args.at[0] - args.at[1])
+        self.assertEqual(args.at[0], args.since.astimezone(datetime.timezone.utc))
+        self.assertEqual(args.since.date() - datetime.timedelta(days=1), args.date)
+        later = self.parser.parse_args('--since now'.split()).since
+        self.assertGreaterEqual(later, args.since)
+        self.assertEqual(datetime.date(2013, 4, 22),
+                         self.parser.parse_args('--date 22.4.13'.split()).date)
+        self.assertRaises(SystemExit, self.parser.parse_args, '--since last'.split())
+        for action in [timeparse.ParseTimedelta, timeparse.ParseDateStream]:
+            self.assertRaises(ValueError, self.parser.add_argument, '--foo',
+                              action=action, relative=True)
+        args = self.parser.parse_args('--at now --at 2h30m'.split())
+        self.assertEqual(datetime.timedelta(hours=2, minutes=30), args.at[1] - args.at[0])
+
+        parser = timeparse.TimeArgumentParser()
+        parser.add_argument('--since', action=timeparse.ParseDatetime, relative=True)
+        namespace = argparse.Namespace()
+        first = parser.parse_args(['--since', 'now'], namespace=namespace).since
+        time.sleep(0.01)
+        self.assertGreater(parser.parse_args(['--since', 'now'], namespace=namespace).since, first)
+
+    def test_daytime(self):
+        self.parser.add_argument('--daytime', action=timeparse.ParseDaytime)
+        self.parser.add_argument('--daytimes', action=timeparse.AppendDaytime, nargs='+',
+                                 each=True)
+        args = self.parser.parse_args('--daytime 08:00 --daytimes 08:00 23:30:15'.split())
+        self.assertIs(args.daytime, args.daytimes[0])
+        self.assertIs(args.daytime, timeparse.make_daytime(8, 0))
+        self.assertEqual([Daytime(8), Daytime(23, 30, 15)], args.daytimes)
+        self.assertTrue(all(type(d) is Daytime for d in args.daytimes))
+        self.assertIs(timeparse.make_daytime(22, 3), timeparse.try_parse('daytime', '22 03'))
+        self.assertEqual(Daytime(23, 30, 15), timeparse.parse_many('daytime', ['23:30:15'])[0])
+        self.assertIsNot(timeparse.make_daytime(8, 0, 1), timeparse.make_daytime(8, 0, 1))
+        locked = self.parser.add_argument('--t', action=timeparse.AppendDaytime,
+                                          lock_format=True, nargs='+')
+        self.assertEqual([Daytime(22, 3), Daytime(23, 4)],
+                         self.parser.parse_args('--t 22 03 --t 23 04'.split()).t)
+        self.assertEqual({'time': '%H %M'}, locked.format_lock.formats)
+
+    def test_TimeArgumentParser(self):
+        def build(cls, **kwargs):
+            parser = cls(fromfile_prefix_chars='@', **kwargs)
+            parser.add_argument('--at', '-a', action=timeparse.AppendDaytime)
+            parser.add_argument('--skip-date', action=timeparse.AppendDate, order='unique')
+            parser.add_argument('--pair', action=timeparse.AppendDatetime, nargs=2)
+            parser.add_argument('--date', action=timeparse.ParseDate)
+            parser.add_argument('--name')
+            parser.add_argument('pos')
+            return parser
+        plain, batched = build(argparse.ArgumentParser), build(timeparse.TimeArgumentParser)
+        for cmdline in ['--at 08:00 P --skip-date 2.1.13 --at 23:30 --skip-date 1.1.13 --at 08:00',
+                        '--at=08:00 -a 12:00 --a 13:00 --pair 22.4.13 08:00 P --pair 1.1.13 8:00',
+                        '-a12:00 --at 13:00 --name=--at P', '--name x --at 08:00 -- P',
+                        '--skip-date 1.1.13 --date 2.2.13 P --skip-date 1.1.13']:
+            self.assertEqual(plain.parse_args(cmdline.split()),
+                             batched.parse_args(cmdline.split()))
+        self.assertRaises(SystemExit, batched.parse_args, '--at 08:00 P --at 25:00'.split())
+
+        parser = timeparse.TimeArgumentParser()
+        parser.add_argument('--date', action=timeparse.AppendDate, choices=['1.1.13'])
+        parser.add_argument('--at', action=timeparse.AppendDaytime, type=lambda s: s + ':00')
+        parser.add_argument('--day', action=timeparse.AppendDate)
+        parser.add_argument('--clear', action='store_const', const=[], dest='day')
+        parser.add_argument('pos', nargs=2)
+        self.assertEqual({}, parser.batchable())
+        args = parser.parse_args('--at 8 --day 1.1.13 --clear --day 2.1.13 a b'.split())
+        self.assertEqual(([Daytime(8)], [datetime.date(2013, 1, 2)]), (args.at, args.day))
+        self.assertRaises(SystemExit, parser.parse_args, '--date 2.1.13 a b'.split())
+        parser = timeparse.TimeArgumentParser()
+        parser.add_argument('--day', action=timeparse.AppendDate)
+        parser.add_argument('pos', nargs=2)
+        self.assertRaises(SystemExit, parser.parse_args, 'a --day 1.1.13 b'.split())
+        timeparse.stats_reset()
+        timeparse.enable_stats()
+        try:
+            parser.parse_args('--day 1.1.13 --day 1.1.13 a b'.split())
+        finally:
+            timeparse.enable_stats(False)
+        self.assertEqual(2, timeparse.stats()['AppendDate:day']['calls'])
+
+        directory = tempfile.mkdtemp()
+        files = dict(
+            txt = '--at\n08:00\n--skip-date\n1.1.13\n--at\n23:30',
+            json = '{"--at": ["08:00", "23:30"], "--skip-date": "1.1.13"}',
+            ndjson = '["--at", "08:00"]\n{"--skip-date": "1.1.13"}\n\n"--at"\n"23:30"\n',
+            )
+        for suffix, content in files.items():
+            path = os.path.join(directory, 'args.' + suffix)
+            with open(path, 'w') as f:
+                f.write(content)
+            args = batched.parse_args(['@' + path, 'P'])
+            self.assertEqual([Daytime(8), Daytime(23, 30)], args.at)
+            self.assertEqual([datetime.date(2013, 1, 1)], args.skip_date)
+            os.remove(path)
+
+        config = timeparse.TimeConfig(endian='big')
+        parser = timeparse.TimeArgumentParser(config=config)
+        parser.add_argument('--date', action=timeparse.AppendDate)
+        self.assertIs(config, parser._option_string_actions['--date'].config)
+        self.assertEqual([datetime.date(2013, 4, 22)], parser.parse_args('--date 13.4.22'.split()).date)
+
+    def test_output(self):
+        parser = timeparse.TimeArgumentParser()
+        parser.add_argument('--datetime', action=timeparse.ParseDatetime, nargs=2,
+                            as_='epoch')
+        parser.add_argument('--iso', action=timeparse.ParseDatetime, as_='epoch_ns',
+                            default_tz='+02:00', config=timeparse.TimeConfig(endian='big'))
+        parser.add_argument('--dates', action=timeparse.AppendDate, as_='epoch_ns',
+                            order='sorted')
+        parser.add_argument('--at', action=timeparse.AppendDaytime, as_='epoch')
+        parser.add_argument('--days', action=timeparse.ParseTimedelta, nargs='+',
+                            as_='epoch')
+        args = parser.parse_args(['--datetime', '24.4.13', '23:22+02:00', '--days', '1', '2',
+                                  '--iso', '2013-04-24T23:22:00', '--dates', '2.1.70',
+                                  '--dates', '1.1.70', '--at', '08:00', '--at', '08:00:01'])
+        self.assertEqual(datetime.datetime(2013, 4, 24, 21, 22, tzinfo=datetime.timezone.utc),
+                         datetime.datetime.fromtimestamp(args.datetime, datetime.timezone.utc))
+        self.assertEqual(args.datetime * 10**9, args.iso)
+        self.assertEqual([0, 86400 * 10**9], args.dates)
+        self.assertEqual([28800.0, 28801.0], args.at)
+        self.assertEqual(93600.0, args.days)
+
+        relative = self.parser.add_argument('--since', action=timeparse.ParseDatetime,
+                                            relative=True, as_='epoch')
+        relative(self.parser, argparse.Namespace(), 'now')
+        self.assertIsInstance(self.parser.parse_args(['--since=-2h']).since, float)
+        if hasattr(time, 'tzset'):
+            tz = os.environ.get('TZ')
+            os.environ['TZ'] = 'America/New_York'
+            time.tzset()
+            try:
+                since = self.parser.parse_args(['--since', 'now']).since
+                self.assertAlmostEqual(time.time(), since, delta=5)
+            finally:
+                if tz is None:
+                    del os.environ['TZ']
+                else:
+                    os.environ['TZ'] = tz
+                time.tzset()
+        self.assertRaises(ValueError, self.parser.add_argument, '--x',
+                          action=timeparse.ParseDate, as_='timedelta64')
+        self.assertRaises(ValueError, self.parser.add_argument, '--y',
+                          action=timeparse.AppendTimeOrDatetime, as_='epoch')
+        self.assertRaises(ValueError, self.parser.add_argument, '--z',
+                          action=timeparse.AppendDate, as_='epoch', container='compact')
+        for option in [dict(as_='epoch'), dict(container='compact'), dict(order='sorted')]:
+            self.assertRaises(ValueError, self.parser.add_argument, '--stream',
+                              action=timeparse.ParseDatetimeStream, **option)
+        if numpy is None:
+            self.assertRaises(ImportError, self.parser.add_argument, '--d64',
+                              action=timeparse.ParseDate, as_='datetime64')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_output_numpy(self):
+        self.parser.add_argument('--date', action=timeparse.ParseDate, as_='datetime64')
+        self.parser.add_argument('--datetime', action=timeparse.ParseDatetime,
+                                 as_='datetime64', config=timeparse.TimeConfig(endian='big'))
+        self.parser.add_argument('--time', action=timeparse.ParseTime, as_='timedelta64')
+        args = self.parser.parse_args('--date 24.4.13 --datetime 2013-04-24T23:22Z '
+                                      '--time 23:22'.split())
+        self.assertEqual(numpy.datetime64('2013-04-24'), args.date)
+        self.assertEqual(numpy.datetime64('2013-04-24T23:22'), args.datetime)
+        self.assertEqual(numpy.timedelta64(23 * 60 + 22, 'm'), args.time)
+
+    def test_lazy_import(self):
+        script = (
+            "import sys, argparse, timeparse\n"
+            "parser = argparse.ArgumentParser()\n"
+            "for i, action in enumerate([timeparse.ParseTime, timeparse.ParseDaytime,\n"
+            "        timeparse.ParseDate, timeparse.ParseTimedelta, timeparse.ParseDatetime,\n"
+            "        timeparse.ParseTimeOrDatetime, timeparse.AppendTime, timeparse.AppendDaytime,\n"
+            "        timeparse.AppendDate, timeparse.AppendTimedelta, timeparse.AppendDatetime]):\n"
+            "    parser.add_argument('--arg%d' % i, action=action)\n"
+            "parser.parse_args([])\n"
+            "print('timeparser' in sys.modules or 'daytime' in sys.modules)\n"
+            )
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(b'False', output.strip())
+
+    def test_stats(self):
+        self.parser.add_argument(
+            '--date',
+            action=timeparse.ParseDate,
+            )
+        events = list()
+        timeparse.stats_reset()
+        timeparse.set_observer(events.append)
+        try:
+            self.parser.parse_args('--date 22.4.13'.split())
+            self.assertRaises(SystemExit, self.parser.parse_args, ('--date foo'.split()))
+        finally:
+            timeparse.set_observer(None)
+            timeparse.enable_stats(False)
+        stats = timeparse.stats()['ParseDate:date']
+        self.assertEqual(2, stats['calls'])
+        self.assertEqual({'date': 1}, stats['failures'])
+        self.assertEqual([None, 'date'], [e.error for e in events])
+
+        self.parser.parse_args('--date 22.4.13'.split())
+        self.assertEqual(2, timeparse.stats()['ParseDate:date']['calls'])
+
+    def test_aparse(self):
+        import asyncio
+        self.assertEqual(
+            datetime.date(2013, 4, 22),
+            asyncio.run(timeparse.aparse('date', '22.4.13'))
+            )
+        strings = ['22.4.13', '23.4.13', '24.4.13'] * 10
+        self.assertEqual(
+            timeparse.parse_many('date', strings),
+            asyncio.run(timeparse.aparse_many('date', strings, chunksize=7, limit=2))
+            )
+        self.assertRaises(ValueError, asyncio.run,
+                          timeparse.aparse_many('date', strings + ['foo'], chunksize=7))
+
+    def test_parse_parallel(self):
+        strings = ['13.4.22', '13.4.23', '13.4.24'] * 10
+        self.assertEqual(
+            timeparse.parse_many('date', strings),
+            timeparse.parse_parallel('date', strings, workers=2, chunksize=4)
+            )
+        timeparser.ENDIAN.set('big')
+        try:
+            values = timeparse.parse_parallel('date', strings, workers=2)
+        finally:
+            timeparser.ENDIAN.set('little')
+        self.assertEqual(datetime.date(2013, 4, 22), values[0])
 
 
 if __name__ == '__main__':
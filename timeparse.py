@@ -2,42 +2,2748 @@
 An :mod:`argparse`-extension for parsing command-line arguments as objects of the
 :mod:`datetime`-module.
 """
+import os
+import re
+import string as _string
 import datetime
+import sys
+import time
+import array
+import bisect
 import argparse
+import functools
+import threading
+import weakref
+from collections import deque
+from itertools import count, groupby
 from argparse import ArgumentError
+from collections import Counter, OrderedDict, namedtuple
+from collections.abc import Sequence
 
-import timeparser
-from daytime import Daytime
 
+__version__ = '0.5.5'
+
+
+class LazyImport(object):
+    """
+    Placeholder for a module or an attribute of a module, which is imported
+    on first use and then replaces the placeholder in the namespace of
+    timeparse. Defining parsers (or just running '--help') thereby never pays
+    for importing :mod:`timeparser`, which guesses the local date-order by
+    running a subprocess.
+
+    :arg str name:      Name of the placeholder in this module.
+    :arg str module:    Name of the module to import.
+    :arg str attr:      Optional attribute of the module to use.
+    """
+    def __init__(self, name, module, attr=None):
+        self._name = name
+        self._module = module
+        self._attr = attr
+
+    def _load(self):
+        __import__(self._module)
+        obj = sys.modules[self._module]
+        if self._attr:
+            obj = getattr(obj, self._attr)
+        globals()[self._name] = obj
+        return obj
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        return '<lazy %s>' % '.'.join(filter(None, (self._module, self._attr)))
+
+
+timeparser = LazyImport('timeparser', 'timeparser')
+Daytime = LazyImport('Daytime', 'daytime', 'Daytime')
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+PARSERS = dict(
+    time = 'parsetime',
+    date = 'parsedate',
+    datetime = 'parsedatetime',
+    timedelta = 'parsetimedelta',
+    )
+"""Maps the kinds of values to the :mod:`timeparser`-function parsing them."""
+
+FORMAT_OPTIONS = ('SEPS', 'ALLOW_NO_SEP', 'FIGURES', 'TRY_HARD', 'USE_FORMATS',
+                  'USE_SFORMATS', 'MONTH_CODE', 'YEAR_CODE')
+
+
+OPTION_NAMES = dict(
+    seps = 'SEPS',
+    allow_no_sep = 'ALLOW_NO_SEP',
+    figures = 'FIGURES',
+    try_hard = 'TRY_HARD',
+    use_formats = 'USE_FORMATS',
+    use_sformats = 'USE_SFORMATS',
+    month_code = 'MONTH_CODE',
+    year_code = 'YEAR_CODE',
+    )
+"""
+Maps the keywords of the ``config``-methods of the :mod:`timeparser`-format-
+classes to :data:`FORMAT_OPTIONS`. ``allow_month_name`` is accepted as well.
+"""
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _thaw(value):
+    return list(value) if isinstance(value, tuple) else value
+
+
+def config_key():
+    """
+    Return a hashable snapshot of the current :mod:`timeparser`-configuration:
+    :attr:`timeparser.ENDIAN`, :attr:`timeparser.TODAY` and the settings of
+    the format-classes.
+    """
+    key = [timeparser.ENDIAN._key, (timeparser.TODAY.year,
+           timeparser.TODAY.month, timeparser.TODAY.day)]
+    for cls in (timeparser.TimeFormats, timeparser.DateFormats,
+                timeparser.DatetimeFormats):
+        key.append(tuple(_freeze(getattr(cls, o, None)) for o in FORMAT_OPTIONS))
+    return tuple(key)
+
+
+def _configure(module, key):
+    endian, today = key[:2]
+    module.ENDIAN.set(endian)
+    module.TODAY.set(*today)
+    for cls, options in zip((module.TimeFormats, module.DateFormats,
+                             module.DatetimeFormats), key[2:]):
+        for option, value in zip(FORMAT_OPTIONS, options):
+            current = cls.__dict__.get(option)
+            if isinstance(current, list) and isinstance(value, tuple):
+                current[:] = value
+            elif value is not None:
+                setattr(cls, option, _thaw(value))
+
+
+def apply_config(key):
+    """
+    Configure :mod:`timeparser` according to *key* as returned by
+    :func:`config_key`, e.g. to carry the configuration over to another
+    process.
+    """
+    _configure(timeparser, key)
+
+
+_formats_lock = threading.Lock()
+_formats_module = None
+
+
+def _formats_timeparser():
+    """
+    Return a private instance of the :mod:`timeparser`-module, which
+    :meth:`TimeConfig.formats` configures to produce formats. The global state
+    of :mod:`timeparser` itself is thereby never changed.
+    """
+    global _formats_module
+    if _formats_module is None:
+        import importlib.util
+        spec = importlib.util.find_spec(timeparser.__name__)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _formats_module = module
+    return _formats_module
+
+
+class Patterns(object):
+    """
+    Regular expressions, which are compiled on first use to keep the import
+    of timeparse cheap.
+    """
+    PATTERNS = dict(
+        time = r'([0-9]{1,2}):([0-9]{1,2})(?::([0-9]{1,2}))?\Z',
+        date = r'([0-9]{1,4})([-./ ])([0-9]{1,4})(?:\2([0-9]{1,4}))?\Z',
+        digits = r'[0-9]+\Z',
+        letter = r'[A-Za-z]',
+        negative = r'-[0-9]+\Z|-[0-9]*\.[0-9]+\Z',
+        iso_duration = r'([-+]?)P(?!\Z)(?:([0-9]+)W)?(?:([0-9]+)D)?'
+                       r'(?:T(?=[0-9])(?:([0-9]+)H)?(?:([0-9]+)M)?'
+                       r'(?:([0-9]+(?:[.,][0-9]+)?)S)?)?\Z',
+        timedelta = r'[-+]?[0-9]+|[a-zA-Z]+',
+        iso_datetime = r'([0-9]{4})-([0-9]{2})-([0-9]{2})[T ]'
+                       r'([0-9]{2}):([0-9]{2})(?::([0-9]{2})(?:\.([0-9]{1,6}))?)?'
+                       r'(Z|[-+][0-9]{2}(?::?[0-9]{2})?)?\Z',
+        tz_offset = r'([-+])([0-9]{2})(?::?([0-9]{2}))?\Z',
+        tz_name = r'[A-Za-z][A-Za-z0-9_+-]*(?:/[A-Za-z0-9_+-]+)*\Z',
+        tz_suffix = r'(.*[0-9]:[0-9]{2}(?::[0-9]{2}(?:[.,][0-9]+)?)?)'
+                    r'(Z|[-+][0-9]{2}(?::?[0-9]{2})?)\Z',
+        relative = r' *(?:([0-9]{1,2}):([0-9]{2})(?::([0-9]{2}))?(?![0-9])'
+                   r'|([-+]?[0-9]+) *([a-z]+)|([a-z]+))',
+        )
+
+    def __getattr__(self, name):
+        try:
+            regex = re.compile(self.PATTERNS[name])
+        except KeyError:
+            raise AttributeError(name)
+        setattr(self, name, regex)
+        return regex
+
+
+_RE = Patterns()
+
+
+def _time_fields(string, config):
+    cls = (config or current_config()).time
+    if cls.TRY_HARD or not cls.USE_FORMATS:
+        return None
+    match = _RE.time.match(string)
+    if match:
+        if ':' not in cls.SEPS: return None
+        fields = [int(v) for v in match.groups() if v is not None]
+    elif len(string) in (4, 6) and cls.ALLOW_NO_SEP and _RE.digits.match(string):
+        fields = [int(string[i:i+2]) for i in range(0, len(string), 2)]
+    else:
+        return None
+    if not cls.FIGURES[len(fields) - 1]:
+        return None
+    if fields[0] > 23 or any(v > 59 for v in fields[1:]):
+        return None
+    return fields
+
+
+def _fast_time(string, config=None):
+    fields = _time_fields(string, config)
+    return None if fields is None else datetime.time(*fields)
+
+
+def _fast_daytime(string, config=None):
+    fields = _time_fields(string, config)
+    return None if fields is None else make_daytime(*fields)
+
+
+def _valid_date(year, month, day):
+    return 1 <= year and 1 <= month <= 12 and 1 <= day <= days_in_month(year, month)
+
+
+def _date_fields(string, config):
+    config = config or current_config()
+    cls = config.date
+    if cls.TRY_HARD or not cls.USE_FORMATS or not cls.MONTH_CODE[0]:
+        return None
+    endian = config.endian
+    match = _RE.date.match(string)
+    if match:
+        if match.group(2) not in cls.SEPS: return None
+        values = [v for v in match.group(1, 3, 4) if v is not None]
+        if len(values) == 2:
+            endian = config.endian_no_year
+    elif cls.ALLOW_NO_SEP and _RE.digits.match(string):
+        if len(string) <= 2:
+            values, endian = [string], ('day',)
+        elif len(string) in (6, 8):
+            widths = dict(day=2, month=2, year=len(string) - 4)
+            values, i = list(), 0
+            for key in endian:
+                values.append(string[i:i+widths[key]])
+                i += widths[key]
+        else:
+            return None
+    else:
+        return None
+    if not cls.FIGURES[len(values) - 1]:
+        return None
+
+    fields = dict(zip(endian, values))
+    if any(len(fields[k]) > 2 for k in ('day', 'month') if k in fields):
+        return None
+    if 'year' in fields:
+        year = fields['year']
+        if len(year) not in (2, 4) or not cls.YEAR_CODE[len(year) == 4]:
+            return None
+        year = int(year)
+        if len(fields['year']) == 2:
+            year += 2000 if year <= 68 else 1900
+    else:
+        year = None
+    day = int(fields['day'])
+    month = int(fields.get('month', 1))
+    if year is not None:
+        return (year, month, day) if _valid_date(year, month, day) else None
+    # complete the date the way timeparser.parsedate does
+    if not _valid_date(1900, month, day):
+        return None
+    year = config.today.year
+    if 'month' not in fields:
+        month = config.today.month
+    return (year, month, day) if day <= days_in_month(year, month) else None
+
+
+def _fast_date(string, config=None):
+    fields = _date_fields(string, config)
+    return None if fields is None else datetime.date(*fields)
+
+
+_daytimes = [None] * 1440
+
+
+def make_daytime(hour, minute, second=0, microsecond=0):
+    """
+    Return the :class:`daytime.Daytime` for the given fields. The 1440
+    daytimes of whole minutes are interned: each of them is built once and
+    shared, since daytimes are immutable.
+    """
+    if second or microsecond:
+        return Daytime(hour, minute, second, microsecond)
+    index = hour * 60 + minute
+    daytime = _daytimes[index]
+    if daytime is None:
+        daytime = _daytimes[index] = Daytime(hour, minute)
+    return daytime
+
+
+def _datetime_fields(string, config):
+    match = _RE.iso_datetime.match(string)
+    if not match:
+        return None
+    # the iso-shape must be allowed by the configuration like any other
+    config = config or current_config()
+    groups = match.groups()
+    time = [v for v in groups[3:7] if v is not None]
+    cls = config.datetime
+    if cls.TRY_HARD or not cls.USE_FORMATS or string[10] != 'T' and ' ' not in cls.SEPS:
+        return None
+    cls = config.time
+    if cls.TRY_HARD or not cls.USE_FORMATS or ':' not in cls.SEPS or not cls.FIGURES[len(time) - 1]:
+        return None
+    date = _date_fields(string[:10], config)
+    if date is None:
+        return None
+    time = [int(v.ljust(6, '0')) if i == 3 else int(v) for i, v in enumerate(time)]
+    time += [0] * (4 - len(time))
+    tz = groups[7] and resolve_tz(groups[7])
+    if tz is None and groups[7]:
+        return None
+    if time[0] > 23 or time[1] > 59 or time[2] > 59:
+        return None
+    return date + tuple(time) + (tz,)
+
+
+def _fast_datetime(string, config=None):
+    fields = _datetime_fields(string, config)
+    return None if fields is None else datetime.datetime(*fields[:7], tzinfo=fields[7])
+
+
+FASTPATHS = dict(
+    time = _fast_time,
+    daytime = _fast_daytime,
+    date = _fast_date,
+    datetime = _fast_datetime,
+    )
+"""
+Recognizers for the most common forms of each kind, which are tried before
+the format-search of :mod:`timeparser`. A recognizer takes the string and
+optionally a :class:`TimeConfig` and returns None for anything it is not sure
+about.
+"""
+
+
+FORMAT_CLASSES = dict(
+    time = 'TimeFormats',
+    date = 'DateFormats',
+    datetime = 'DatetimeFormats',
+    )
+"""Maps the kinds of values to the :mod:`timeparser`-format-class for them."""
+
+_SHAPE = str.maketrans(_string.digits, '0' * len(_string.digits))
+_formats = dict()
+
+
+class DiskCache(object):
+    """
+    Persistent cache of the formats produced per shape (s. :func:`formats`),
+    which lets short-lived processes skip the format-generation of
+    :mod:`timeparser`. The formats are stored in a sqlite-database, which can
+    be shared by concurrent processes. Entries are bound to the version of
+    :mod:`timeparser` and the configuration of the format-classes, entries of
+    other versions are dropped on opening. The oldest entries are dropped once
+    there are more than *size*.
+
+    The cache is used if the environment-variable TIMEPARSE_CACHE holds the
+    path of the database (s. :func:`disk_cache`). Failures of the database
+    (e.g. a lock held too long by another process) are ignored.
+
+    :arg str path:      Path of the database.
+    :arg int size:      Maximal number of entries.
+    """
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS formats ('
+        'version TEXT, config TEXT, kind TEXT, shape TEXT, formats TEXT, '
+        'PRIMARY KEY (version, config, kind, shape))'
+        )
+
+    def __init__(self, path, size=10000):
+        import sqlite3
+        self.path = os.path.expanduser(path)
+        self.size = size
+        self.errors = sqlite3.Error
+        self.version = str(getattr(timeparser, '__version__', None))
+        self.connect = functools.partial(sqlite3.connect, self.path, timeout=5,
+                                         isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.pid = os.getpid()
+        self.db = self.connect()
+        self.db.execute(self.SCHEMA)
+        self.db.execute('DELETE FROM formats WHERE version != ?', (self.version,))
+
+    def execute(self, sql, args=()):
+        # connections must not be shared with forked processes
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid, self.db = os.getpid(), self.connect()
+            return self.db.execute(sql, args).fetchall()
+
+    @staticmethod
+    def config(config):
+        # timeparser.TODAY has no influence on the formats
+        return repr(config[:1] + config[2:])
+
+    def get(self, config, kind, shape):
+        """
+        Return the formats for *shape* or None.
+        """
+        try:
+            rows = self.execute(
+                'SELECT formats FROM formats WHERE version = ? AND config = ? '
+                'AND kind = ? AND shape = ?',
+                (self.version, self.config(config), kind, shape))
+        except self.errors:
+            return None
+        if not rows:
+            return None
+        return tuple(rows[0][0].split('\n')) if rows[0][0] else tuple()
+
+    def put(self, config, kind, shape, formats):
+        """
+        Store *formats* for *shape* and drop the oldest entries if the cache
+        is full.
+        """
+        try:
+            self.execute(
+                'INSERT OR REPLACE INTO formats VALUES (?, ?, ?, ?, ?)',
+                (self.version, self.config(config), kind, shape, '\n'.join(formats)))
+            self.execute(
+                'DELETE FROM formats WHERE rowid IN (SELECT rowid FROM formats '
+                'ORDER BY rowid LIMIT max((SELECT count(*) FROM formats) - ?, 0))',
+                (self.size,))
+        except self.errors:
+            pass
+
+    def clear(self):
+        self.execute('DELETE FROM formats')
+
+
+_disk = False
+
+
+def disk_cache():
+    """
+    Return the :class:`DiskCache` at the path of the environment-variable
+    TIMEPARSE_CACHE or None, if it is not set or the database couldn't be
+    opened. The size can be set by TIMEPARSE_CACHE_SIZE.
+    """
+    global _disk
+    if _disk is False:
+        path = os.environ.get('TIMEPARSE_CACHE')
+        _disk = None
+        if path:
+            try:
+                _disk = DiskCache(path, int(os.environ.get('TIMEPARSE_CACHE_SIZE', 10000)))
+            except Exception:
+                pass
+    return _disk
+
+
+def shape(string):
+    """
+    Reduce *string* to its shape by replacing all digits with '0'. The
+    format-classes of :mod:`timeparser` produce the same formats for strings of
+    the same shape.
+    """
+    return string.translate(_SHAPE)
+
+
+SHAPE_DIRECTIVES = {
+    'd': '(?:00?| 0)', 'm': '00?', 'y': '00', 'Y': '0000', 'H': '00?',
+    'I': '00?', 'M': '00?', 'S': '00?', 'f': '0{1,6}', 'j': '0{1,3}',
+    'U': '00?', 'W': '00?', 'V': '00?', 'G': '0000', 'u': '0', 'w': '0',
+    '%': '%',
+    }
+"""
+Patterns matching the shapes of the values of the numeric directives of
+:func:`time.strptime` (s. :func:`fits`).
+"""
+
+_shape_patterns = dict()
+
+
+def shape_pattern(fmt):
+    """
+    Return a compiled pattern matching the shape of any string *fmt* could
+    parse, or None if *fmt* uses directives without a shape-pattern. Month-
+    and weekday-names and AM/PM-markers use the patterns of :mod:`_strptime`.
+    """
+    try:
+        return _shape_patterns[fmt]
+    except KeyError:
+        pass
+    import _strptime
+    parts = list()
+    index = 0
+    while index < len(fmt):
+        char = fmt[index]
+        if char == '%' and index + 1 < len(fmt):
+            directive = fmt[index + 1]
+            index += 2
+            if directive in SHAPE_DIRECTIVES:
+                parts.append(SHAPE_DIRECTIVES[directive])
+            elif directive in 'aAbBp':
+                parts.append(re.sub(r'\(\?P<\w+>', '(?:', _strptime._TimeRE_cache[directive]))
+            else:
+                parts = None
+                break
+        elif char.isspace():
+            while index < len(fmt) and fmt[index].isspace(): index += 1
+            parts.append(r'\s+')
+        else:
+            parts.append(re.escape(char.translate(_SHAPE)))
+            index += 1
+    try:
+        pattern = re.compile(''.join(parts) + r'\Z', re.IGNORECASE) if parts is not None else None
+    except re.error:
+        pattern = None
+    _shape_patterns[fmt] = pattern
+    return pattern
+
+
+def fits(fmt, shape):
+    """
+    Check if *fmt* could parse any string of *shape* (s. :func:`shape`): the
+    runs of digits must fit the widths of the numeric directives, and names,
+    AM/PM-markers and separators must be at their places. Only formats that
+    can't possibly match are rejected, so the result of :func:`find` doesn't
+    change.
+    """
+    pattern = shape_pattern(fmt)
+    return pattern is None or pattern.match(shape) is not None
+
+
+FormatOptions = namedtuple('FormatOptions', FORMAT_OPTIONS)
+"""The settings of a :mod:`timeparser`-format-class (s. :data:`FORMAT_OPTIONS`)."""
+
+_configs = dict()
+
+
+class TimeConfig(object):
+    """
+    An immutable configuration of :mod:`timeparser`: the endian, the date to
+    complete incomplete dates with and the settings of the format-classes.
+
+    Actions given a config (s. :class:`TimeArgsMixin`) parse with it instead
+    of the global state of :mod:`timeparser`, which is neither read nor
+    changed then. So actions with different configs can parse at the same time
+    in different threads without any lock.
+
+    Configs are interned: equal configs are the same object and share the
+    formats produced for them (s. :meth:`formats`). Anything not given is
+    taken from the current configuration of :mod:`timeparser`.
+
+    :keyword str endian:    'little', 'big' or 'middle'.
+    :keyword today:         :class:`datetime.date` or (year, month, day).
+    :keyword dict time:     Settings of :class:`timeparser.TimeFormats` by
+                            their names (s. :data:`FORMAT_OPTIONS`) or the
+                            keywords of its ``config``-method (s.
+                            :data:`OPTION_NAMES`).
+    :keyword dict date:     Settings of :class:`timeparser.DateFormats`.
+    :keyword dict datetime: Settings of :class:`timeparser.DatetimeFormats`.
+
+    usage:
+        >>> import argparse
+        >>> import timeparse
+
+        >>> config = timeparse.TimeConfig(endian='big', date=dict(SEPS=['-']))
+        >>> config is timeparse.TimeConfig(endian='big', date=dict(SEPS=['-']))
+        True
+        >>> parser = argparse.ArgumentParser(prog='PROG')
+        >>> parser.add_argument(
+        ... '--date',
+        ... action=timeparse.ParseDate,
+        ... config=config
+        ... )
+        >>> parser.parse_args('--date 13-4-22'.split()).date
+        datetime.date(2013, 4, 22)
+    """
+    __slots__ = ('key', 'endian', 'endian_no_year', 'today', 'time', 'date',
+                 'datetime')
+
+    def __new__(cls, endian=None, today=None, **options):
+        key = list(config_key())
+        if endian:
+            key[0] = timeparser.ENDIAN._check_key(endian)
+        if today:
+            key[1] = tuple(today) if isinstance(today, tuple) else (
+                today.year, today.month, today.day)
+        for index, kind in enumerate(('time', 'date', 'datetime'), 2):
+            settings = options.pop(kind, None) or dict()
+            values = list(key[index])
+            for option, value in settings.items():
+                if option == 'allow_month_name':
+                    option, value = 'MONTH_CODE', [True, bool(value), bool(value)]
+                name = OPTION_NAMES.get(option, option)
+                if name not in FORMAT_OPTIONS or values[FORMAT_OPTIONS.index(name)] is None:
+                    raise TypeError("unknown option for %s-formats: %r" % (kind, option))
+                values[FORMAT_OPTIONS.index(name)] = _freeze(value)
+            key[index] = tuple(values)
+        if options:
+            raise TypeError("unknown kinds: %s" % ', '.join(options))
+        return cls.from_key(tuple(key))
+
+    @classmethod
+    def from_key(cls, key):
+        """
+        Return the config for *key* as returned by :func:`config_key`.
+        """
+        try:
+            return _configs[key]
+        except KeyError:
+            pass
+        self = object.__new__(cls)
+        endian = timeparser.ENDIAN.OPTIONS[key[0]]
+        setattr_ = super(TimeConfig, self).__setattr__
+        setattr_('key', key)
+        setattr_('endian', endian)
+        setattr_('endian_no_year', endian[1:] if key[0] == 'big' else endian[:-1])
+        setattr_('today', datetime.date(*key[1]))
+        for kind, options in zip(('time', 'date', 'datetime'), key[2:]):
+            setattr_(kind, FormatOptions(*options))
+        return _configs.setdefault(key, self)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % self.__class__.__name__)
+
+    def __repr__(self):
+        return '%s(endian=%r, today=%r)' % (
+            self.__class__.__name__, self.key[0], self.key[1])
+
+    def __reduce__(self):
+        return (self.from_key, (self.key,))
+
+    def formats(self, kind, string):
+        """
+        Return the formats :mod:`timeparser` tries for *string* with this
+        config.
+
+        The formats are produced once per shape of *string* (s. :func:`shape`)
+        and are kept in the :class:`DiskCache` if there is one. Formats that
+        don't fit the shape are dropped (s. :func:`fits`), so invalid strings
+        are rejected without trying them.
+
+        The format-classes of :mod:`timeparser` only read the configuration
+        of their module. So the formats for a new shape are produced by a
+        private instance of the module (s. :func:`_formats_timeparser`), which
+        is configured under a lock; :mod:`timeparser` itself is left alone.
+        """
+        key = (self, kind, shape(string))
+        try:
+            return _formats[key]
+        except KeyError:
+            pass
+        disk = disk_cache()
+        fmts = disk and disk.get(self.key, kind, key[2])
+        if fmts is None:
+            with _formats_lock:
+                module = _formats_timeparser()
+                _configure(module, self.key)
+                try:
+                    fmts = tuple(getattr(module, FORMAT_CLASSES[kind])(string=string))
+                except ValueError:
+                    fmts = tuple()
+            fmts = tuple(f for f in fmts if fits(f, key[2]))
+            if disk:
+                disk.put(self.key, kind, key[2], fmts)
+        if len(_formats) >= 4096:
+            _formats.clear()
+        _formats[key] = fmts
+        return fmts
+
+
+def current_config():
+    """
+    Return the :class:`TimeConfig` matching the current configuration of
+    :mod:`timeparser`.
+    """
+    return TimeConfig.from_key(config_key())
+
+
+def formats(kind, string, config=None):
+    """
+    Return the formats :mod:`timeparser` tries for *string* with *config*
+    (s. :meth:`TimeConfig.formats`).
+
+    :arg config:    :class:`TimeConfig` or key as returned by
+                    :func:`config_key`; the current configuration if None.
+    """
+    if not isinstance(config, TimeConfig):
+        config = TimeConfig.from_key(config or config_key())
+    return config.formats(kind, string)
+
+
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def days_in_month(year, month):
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month]
+
+
+class CompiledFormat(object):
+    """
+    A format compiled to the regular expression :func:`time.strptime` uses
+    for it, which yields the fields of a matching string without raising an
+    exception for strings that don't match.
+
+    The fields are extracted and validated the way :mod:`_strptime` does it
+    for the directives d, m, y, Y, b, B, H, I, p, M, S, f, a, A and %. Any
+    other format is handled by :func:`time.strptime` itself.
+
+    :arg str fmt:       The format.
+    """
+    DIRECTIVES = frozenset('dmyYbBHIpMSfaA%')
+
+    def __init__(self, fmt):
+        import _strptime
+        self.format = fmt
+        self.has_year = '%y' in fmt.lower()
+        self.has_month = '%m' in fmt or '%b' in fmt.lower()
+        directives = set(fmt[i + 1:i + 2] for i, c in enumerate(fmt) if c == '%')
+        self.regex = None
+        if directives <= self.DIRECTIVES:
+            try: self.regex = _strptime._TimeRE_cache.compile(fmt)
+            except (KeyError, IndexError, re.error): pass
+            self.locale = _strptime._TimeRE_cache.locale_time
+
+    def fields(self, string):
+        """
+        Return year, month, day, hour, minute, second and microsecond of
+        *string* as :func:`time.strptime` would parse them (with 1900 and 1
+        for a missing year, month or day) or None.
+        """
+        if self.regex is None:
+            try: obj = datetime.datetime.strptime(string, self.format)
+            except ValueError: return None
+            return (obj.year, obj.month, obj.day, obj.hour, obj.minute,
+                    obj.second, obj.microsecond)
+        found = self.regex.match(string)
+        if found is None or found.end() != len(string):
+            return None
+        year = 1900
+        month = day = 1
+        hour = minute = second = microsecond = 0
+        found = found.groupdict()
+        for key, value in found.items():
+            if key == 'y':
+                year = int(value)
+                year += 2000 if year <= 68 else 1900
+            elif key == 'Y': year = int(value)
+            elif key == 'm': month = int(value)
+            elif key == 'B': month = self.locale.f_month.index(value.lower())
+            elif key == 'b': month = self.locale.a_month.index(value.lower())
+            elif key == 'd': day = int(value)
+            elif key == 'H': hour = int(value)
+            elif key == 'I':
+                hour = int(value)
+                ampm = found.get('p', '').lower()
+                if ampm in ('', self.locale.am_pm[0]):
+                    if hour == 12: hour = 0
+                elif ampm == self.locale.am_pm[1]:
+                    if hour != 12: hour += 12
+            elif key == 'M': minute = int(value)
+            elif key == 'S': second = int(value)
+            elif key == 'f': microsecond = int(value.ljust(6, '0'))
+        # the checks of the constructors of datetime
+        if not 1 <= year or day > days_in_month(year, month) or second > 59:
+            return None
+        return year, month, day, hour, minute, second, microsecond
+
+
+_compiled = dict()
+
+
+def compiled_format(fmt):
+    """
+    Return the :class:`CompiledFormat` of *fmt*.
+    """
+    try:
+        return _compiled[fmt]
+    except KeyError:
+        return _compiled.setdefault(fmt, CompiledFormat(fmt))
+
+
+def lookup(kind, string, formats, today=None):
+    """
+    Parse *string* with the first matching format of *formats* like the
+    parser-functions of :mod:`timeparser` do, but without raising an
+    exception for each format that doesn't match. Incomplete dates are
+    completed with *today* (:attr:`timeparser.TODAY` if None).
+
+    :returns:   Tuple of the parsed value and the matching format or None.
+    """
+    found = lookup_fields(kind, string, formats, today)
+    if found is None:
+        return None
+    fields, fmt = found
+    if kind == 'time':
+        return datetime.time(*fields[3:]), fmt
+    if kind == 'daytime':
+        return make_daytime(*fields[3:]), fmt
+    if kind == 'date':
+        return datetime.date(*fields[:3]), fmt
+    return datetime.datetime(*fields), fmt
+
+
+def lookup_fields(kind, string, formats, today=None):
+    """
+    Like :func:`lookup` but return the fields year, month, day, hour, minute,
+    second and microsecond of the value instead of the value itself. The
+    date-fields of times are meaningless.
+    """
+    today = today or timeparser.TODAY
+    for fmt in formats:
+        engine = compiled_format(fmt)
+        fields = engine.fields(string)
+        if fields is None:
+            continue
+        if kind in ('time', 'daytime'):
+            return fields, fmt
+        year, month, day, hour, minute, second, microsecond = fields
+        if not engine.has_year:
+            year = today.year
+        if not engine.has_month:
+            month = today.month
+        if day > days_in_month(year, month):
+            # timeparser fails instead of trying the next format
+            return None
+        return (year, month, day, hour, minute, second, microsecond), fmt
+    return None
+
+
+def find(kind, string, formats):
+    """
+    Like :func:`lookup` but raise an exception if *string* couldn't be parsed.
+
+    :returns:   Tuple of the parsed value and the matching format.
+    :raises:    ValueError, if string couldn't been parsed
+    """
+    found = lookup(kind, string, formats)
+    if found is None:
+        raise ValueError("couldn't parse '%s' as %s" % (string, kind))
+    return found
+
+
+def search(kind, string, formats):
+    """
+    Like :func:`find` but return only the parsed value.
+    """
+    return find(kind, string, formats)[0]
+
+
+TIMEDELTA_KEYS = ('weeks', 'days', 'hours', 'minutes', 'seconds')
+"""The keywords of :class:`datetime.timedelta` in descending order."""
+
+_units = dict()
+
+
+def timedelta_key(flag):
+    """
+    Return the first of :data:`TIMEDELTA_KEYS` starting with *flag* (like 'h'
+    or 'min').
+
+    :raises:    ValueError, if no key starts with *flag*
+    """
+    try:
+        return _units[flag]
+    except KeyError:
+        pass
+    for key in TIMEDELTA_KEYS:
+        if key.startswith(flag):
+            _units[flag] = key
+            return key
+    raise ValueError("couldn't find a timedelta-key for '%s'" % flag)
+
+
+def parse_iso_duration(string):
+    """
+    Parse an ISO-8601-duration like 'P1DT2H' or 'PT1H30M'. Years and months
+    are not supported, since they have no fixed length.
+
+    :returns:   :class:`datetime.timedelta` or None, if *string* is no
+                ISO-8601-duration.
+    """
+    match = _RE.iso_duration.match(string)
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    timedelta = datetime.timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+        minutes=int(minutes or 0), seconds=float((seconds or '0').replace(',', '.'))
+        )
+    return -timedelta if sign == '-' else timedelta
+
+
+def parse_timedelta(tokens, key='weeks'):
+    """
+    Parse a list of *tokens* as :class:`datetime.timedelta` the same way as
+    :func:`timeparser.parsetimedelta` parses them joined to a string, but
+    without joining and re-splitting them.
+
+    The numbers within the tokens are the arguments for
+    :class:`datetime.timedelta`. If they are flagged with letters (like '1h 2m')
+    these determine their units (s. :func:`timedelta_key`), otherwise the first
+    number has the unit *key* and each following number the next lesser unit.
+    A single token could also be an ISO-8601-duration (s.
+    :func:`parse_iso_duration`).
+
+    :arg list tokens:   Strings to be parsed.
+    :keyword str key:   One of :data:`TIMEDELTA_KEYS`.
+
+    :raises:            ValueError, if the tokens couldn't been parsed
+    """
+    timedelta = try_parse_timedelta(tokens, key)
+    if timedelta is None:
+        raise ValueError("couldn't parse '%s' as timedelta" % ' '.join(tokens))
+    return timedelta
+
+
+def try_parse_timedelta(tokens, key='weeks'):
+    """
+    Like :func:`parse_timedelta` but return None if the tokens couldn't be
+    parsed.
+    """
+    if len(tokens) == 1 and tokens[0].lstrip('+-')[:1] == 'P':
+        timedelta = parse_iso_duration(tokens[0])
+        if timedelta is not None:
+            return timedelta
+    values, keys = list(), list()
+    for token in tokens:
+        for match in _RE.timedelta.findall(token):
+            if match[-1].isdigit():
+                values.append(int(match))
+            elif match in _units:
+                keys.append(_units[match])
+            elif any(k.startswith(match) for k in TIMEDELTA_KEYS):
+                keys.append(timedelta_key(match))
+            else:
+                return None
+
+    if len(keys) == len(values):
+        kwargs = dict(zip(keys, values))
+    elif keys:
+        return None
+    else:
+        kwargs = dict(zip(TIMEDELTA_KEYS[TIMEDELTA_KEYS.index(key):], values))
+    try:
+        return datetime.timedelta(**kwargs)
+    except (OverflowError, ValueError):
+        return None
+
+
+_tzinfos = dict()
+_offsets = dict()
+
+
+def resolve_tz(name):
+    """
+    Return the :class:`datetime.tzinfo` for *name*: 'Z' and 'UTC', an offset
+    like '+02:00', '+0200' or '+02', or the name of an IANA-timezone like
+    'Europe/Berlin' (resolved by :mod:`zoneinfo` if available). Return None
+    if *name* is no timezone.
+
+    Resolved timezones are cached, and offsets of the same length share one
+    :class:`datetime.timezone`, so parsing many values in one timezone
+    doesn't look it up again.
+    """
+    try:
+        return _tzinfos[name]
+    except KeyError:
+        pass
+    match = _RE.tz_offset.match(name)
+    if name in ('Z', 'UTC'):
+        tz = datetime.timezone.utc
+    elif match:
+        sign, hours, minutes = match.groups()
+        minutes = (int(hours) * 60 + int(minutes or 0)) * (-1 if sign == '-' else 1)
+        try:
+            tz = _offsets[minutes]
+        except KeyError:
+            try: tz = datetime.timezone(datetime.timedelta(minutes=minutes))
+            except ValueError: tz = None
+            else: tz = _offsets.setdefault(minutes, tz)
+    elif _RE.tz_name.match(name):
+        try:
+            import zoneinfo
+            tz = zoneinfo.ZoneInfo(name)
+        except (ImportError, ValueError, KeyError):
+            tz = None
+    else:
+        return None
+    if len(_tzinfos) >= 1024:
+        _tzinfos.clear()
+    _tzinfos[name] = tz
+    return tz
+
+
+def split_tz(string):
+    """
+    Split a trailing timezone off *string*: either a separate word
+    (s. :func:`resolve_tz`) or an offset or 'Z' attached to the time.
+
+    :returns:   Tuple of the remaining string and the tzinfo, which is None if
+                *string* has no timezone.
+    """
+    head, _, word = string.rpartition(' ')
+    if head:
+        tz = resolve_tz(word)
+        if tz is not None:
+            return head.rstrip(), tz
+    match = _RE.tz_suffix.match(string)
+    if match:
+        tz = resolve_tz(match.group(2))
+        if tz is not None:
+            return match.group(1), tz
+    return string, None
+
+
+def _try_parse_aware(string, config):
+    string, tz = split_tz(string)
+    if tz is None:
+        return None
+    obj = _try_parse('datetime', string, (), config)
+    if obj is None or obj.tzinfo is not None:
+        return None
+    return obj.replace(tzinfo=tz)
+
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
+            'sunday')
+
+
+def _relative_words():
+    words = dict(
+        now = ('now', None),
+        today = ('days', 0),
+        yesterday = ('days', -1),
+        tomorrow = ('days', 1),
+        noon = ('time', datetime.time(12)),
+        midnight = ('time', datetime.time(0)),
+        last = ('step', -1),
+        this = ('step', 0),
+        next = ('step', 1),
+        ago = ('ago', None),
+        )
+    for index, day in enumerate(WEEKDAYS):
+        words[day] = words[day[:3]] = ('weekday', index)
+    return words
+
+
+RELATIVE_WORDS = _relative_words()
+"""Maps the words of relative expressions to their token and its value."""
+
+RELATIVE_KINDS = ('time', 'daytime', 'date', 'datetime')
+_RELATIVE_START = frozenset(_string.ascii_letters + '+-')
+
+
+_relative_tokens_cache = dict()
+
+
+def relative_tokens(string):
+    """
+    Return the tokens of the relative expression *string* (lowercase) as
+    tuple of (token, value)-pairs or None if it is no relative expression.
+    The tokens don't depend on the reference and are cached.
+    """
+    try:
+        return _relative_tokens_cache[string]
+    except KeyError:
+        pass
+    tokens = _relative_tokens(string)
+    if len(_relative_tokens_cache) >= 1024:
+        _relative_tokens_cache.clear()
+    _relative_tokens_cache[string] = tokens
+    return tokens
+
+
+def _relative_tokens(string):
+    tokens, pos, sign = list(), 0, 1
+    for match in _RE.relative.finditer(string):
+        if match.start() != pos:
+            return None
+        pos = match.end()
+        hour, minute, second, number, unit, word = match.groups()
+        if hour is not None:
+            if int(hour) > 23 or int(minute) > 59 or int(second or 0) > 59:
+                return None
+            tokens.append(('time', datetime.time(int(hour), int(minute), int(second or 0))))
+        elif number is not None:
+            # an unsigned offset follows the sign of the one before: '-2h30m'
+            if number[0] in '-+':
+                sign = -1 if number[0] == '-' else 1
+            try:
+                key = timedelta_key(unit)
+            except ValueError:
+                return None
+            tokens.append(('offset', datetime.timedelta(**{key: sign * abs(int(number))})))
+        elif word in RELATIVE_WORDS:
+            tokens.append(RELATIVE_WORDS[word])
+        else:
+            return None
+    return tuple(tokens) if tokens and pos == len(string) else None
+
+
+def _set_once(field):
+    def rule(fields, value, now):
+        if field in fields:
+            return False
+        fields[field] = value
+        return True
+    return rule
+
+
+_rule_days = _set_once('days')
+
+
+def _rule_now(fields, value, now):
+    fields['now'] = True
+    return _rule_days(fields, 0, now)
+
+
+def _rule_weekday(fields, weekday, now):
+    step = fields.pop('step', 0)
+    days = weekday - now.weekday()
+    if step < 0 and days >= 0:
+        days -= 7
+    elif step > 0 and days <= 0:
+        days += 7
+    return _rule_days(fields, days, now)
+
+
+def _rule_offset(fields, delta, now):
+    if 'ago' in fields:
+        return False
+    fields['delta'] += delta
+    return True
+
+
+def _rule_ago(fields, value, now):
+    if 'ago' in fields or not fields['delta']:
+        return False
+    fields['ago'] = True
+    fields['delta'] = -fields['delta']
+    return True
+
+
+RELATIVE_RULES = dict(
+    now = _rule_now,
+    days = _rule_days,
+    weekday = _rule_weekday,
+    step = _set_once('step'),
+    time = _set_once('time'),
+    offset = _rule_offset,
+    ago = _rule_ago,
+    )
+"""
+Maps each token of a relative expression to the rule putting its value in
+the fields of the expression. A rule returns False if the token isn't
+allowed at its position.
+"""
+
+
+def parse_relative(kind, string, now):
+    """
+    Evaluate the relative expression *string* as value of *kind* ('time',
+    'daytime', 'date' or 'datetime') with *now* as reference.
+
+    An expression consists of a day ('now', 'today', 'yesterday',
+    'tomorrow', 'last monday', 'this fri', 'next sunday'), a time ('18:00',
+    'noon', 'midnight') and offsets ('-2h', '+1d', '2h30m', '3 days ago'),
+    each of them optional. Without a day the day of *now* is used. Without a
+    time a given day starts at midnight, otherwise it is the time of *now*.
+    So 'yesterday 18:00', 'last monday', '-2h' and 'tomorrow noon +30m' are
+    all valid expressions. Times have no day but 'now' and dates no time.
+
+    :arg datetime now:  Reference-datetime; its tzinfo is kept.
+    :returns:           The value or None if *string* is no relative
+                        expression.
+    """
+    tokens = relative_tokens(string.strip().lower())
+    if tokens is None or kind not in RELATIVE_KINDS:
+        return None
+    fields = dict(delta=datetime.timedelta())
+    for token, value in tokens:
+        if 'step' in fields and token != 'weekday':
+            return None
+        if not RELATIVE_RULES[token](fields, value, now):
+            return None
+    if 'step' in fields:
+        return None
+    if kind in ('time', 'daytime') and 'days' in fields and 'now' not in fields:
+        return None
+    if kind == 'date' and 'time' in fields:
+        return None
+    if 'time' in fields:
+        time = fields['time']
+    elif 'days' in fields and 'now' not in fields:
+        time = datetime.time()
+    else:
+        time = now.time()
+    date = now.date() + datetime.timedelta(days=fields.get('days', 0))
+    try:
+        value = datetime.datetime.combine(date, time, now.tzinfo) + fields['delta']
+    except OverflowError:
+        return None
+    if kind == 'date':
+        return value.date()
+    elif kind == 'time':
+        return value.time()
+    elif kind == 'daytime':
+        return make_daytime(value.hour, value.minute, value.second, value.microsecond)
+    return value
+
+
+_anchor = threading.local()
+
+
+def capture_anchor(namespace=None):
+    """
+    Return the reference of relative expressions (s. :func:`parse_relative`)
+    as timezone-aware utc-datetime. It is captured once per *namespace*, so
+    all arguments of one call of :meth:`argparse.ArgumentParser.parse_args`
+    share it. Without a namespace the anchor of the last namespace is kept.
+
+    A namespace reused for several calls of parse_args keeps its anchor
+    unless :func:`reset_anchor` is called in between;
+    :class:`TimeArgumentParser` does so on each call.
+    """
+    ref = getattr(_anchor, 'namespace', None)
+    if ref is None or (namespace is not None and ref() is not namespace):
+        try:
+            _anchor.namespace = weakref.ref(namespace) if namespace is not None else ref
+        except TypeError:
+            _anchor.namespace = lambda: namespace
+        _anchor.now = datetime.datetime.now(datetime.timezone.utc)
+        _anchor.zones = dict()
+    return _anchor.now
+
+
+def reset_anchor():
+    """
+    Drop the anchor of the current thread (s. :func:`capture_anchor`), so the
+    next relative expression captures a new one.
+    """
+    for name in ('namespace', 'now', 'zones'):
+        _anchor.__dict__.pop(name, None)
+
+
+def anchor(tz=None):
+    """
+    Return the current anchor (s. :func:`capture_anchor`) in timezone *tz*
+    or as naive local datetime if *tz* is None. The conversion is done once
+    per anchor and timezone.
+    """
+    now = capture_anchor()
+    try:
+        return _anchor.zones[tz]
+    except KeyError:
+        pass
+    if tz is None:
+        local = now.astimezone().replace(tzinfo=None)
+    else:
+        local = now.astimezone(tz)
+    return _anchor.zones.setdefault(tz, local)
+
+
+def parse(kind, string, *args):
+    """
+    Parse *string* as value of *kind* (s. :data:`PARSERS`).
+
+    Numeric time- and date-strings like '23:22', '220316', '22.4.13' or
+    '22042013' as well as ISO-8601-dates and -datetimes like
+    '2013-04-24T23:22:00' are recognized directly, as far as the
+    configuration allows their shape (ISO-8601 needs the big-endian);
+    anything else is searched with the formats of :mod:`timeparser`. Datetimes may end with a timezone
+    (s. :func:`split_tz`) and are returned timezone-aware then.
+
+    :raises:    ValueError, if string couldn't been parsed
+    """
+    obj = _try_parse(kind, string, args)
+    if obj is None:
+        raise ValueError("couldn't parse '%s' as %s" % (string, kind))
+    return obj
+
+
+def _try_parse(kind, string, args, config=None):
+    config = config or current_config()
+    fastpath = FASTPATHS.get(kind)
+    obj = fastpath(string, config) if fastpath else None
+    if obj is not None:
+        return obj
+    elif kind in FORMAT_CLASSES or kind == 'daytime':
+        base = 'time' if kind == 'daytime' else kind
+        found = lookup(kind, string, config.formats(base, string), config.today)
+        if found is None and kind == 'datetime':
+            return _try_parse_aware(string, config)
+        return found and found[0]
+    elif kind == 'timedelta':
+        return try_parse_timedelta(string.split(), *args)
+    else:
+        raise ValueError("unknown kind '%s'" % kind)
+
+
+def _try_fields(kind, string, args, config=None):
+    config = config or current_config()
+    if kind == 'timedelta':
+        return _try_parse(kind, string, args, config)
+    if kind in ('time', 'daytime'):
+        fields = _time_fields(string, config)
+        if fields is not None:
+            return (None, None, None) + tuple(fields) + (0,) * (4 - len(fields)) + (None,)
+    elif kind == 'date':
+        fields = _date_fields(string, config)
+        if fields is not None:
+            return fields + (0, 0, 0, 0, None)
+    elif kind == 'datetime':
+        fields = _datetime_fields(string, config)
+        if fields is not None:
+            return fields
+    else:
+        raise ValueError("unknown kind '%s'" % kind)
+    base = 'time' if kind == 'daytime' else kind
+    found = lookup_fields(kind, string, config.formats(base, string), config.today)
+    if found is not None:
+        return found[0] + (None,)
+    if kind != 'datetime':
+        return None
+    string, tz = split_tz(string)
+    if tz is None:
+        return None
+    fields = _try_fields('datetime', string, (), config)
+    if fields is None or fields[7] is not None:
+        return None
+    return fields[:7] + (tz,)
+
+
+def _fields_of(obj):
+    if isinstance(obj, datetime.datetime):
+        return (obj.year, obj.month, obj.day, obj.hour, obj.minute, obj.second,
+                obj.microsecond, obj.tzinfo)
+    elif isinstance(obj, datetime.date):
+        return (obj.year, obj.month, obj.day, 0, 0, 0, 0, None)
+    elif isinstance(obj, datetime.time):
+        return (None, None, None, obj.hour, obj.minute, obj.second, obj.microsecond, None)
+    return obj
+
+
+OUTPUTS = ('datetime', 'epoch', 'epoch_ns', 'datetime64', 'timedelta64')
+"""
+Representations the actions can produce (s. :class:`TimeArgsMixin`):
+'datetime' for the objects of :mod:`datetime` resp. :class:`daytime.Daytime`,
+'epoch' for seconds as float and 'epoch_ns' for nanoseconds as int,
+'datetime64' and 'timedelta64' for the scalars of :mod:`numpy`.
+"""
+
+OUTPUT_KINDS = dict(
+    time = ('datetime', 'epoch', 'epoch_ns', 'timedelta64'),
+    daytime = ('datetime', 'epoch', 'epoch_ns', 'timedelta64'),
+    date = ('datetime', 'epoch', 'epoch_ns', 'datetime64'),
+    datetime = ('datetime', 'epoch', 'epoch_ns', 'datetime64'),
+    timedelta = ('datetime', 'epoch', 'epoch_ns', 'timedelta64'),
+    )
+"""Maps the kinds of values to the representations (s. :data:`OUTPUTS`) available for them."""
+
+_month_days = dict()
+
+
+def _epoch_days(year, month, day):
+    try:
+        return _month_days[year, month] + day - 1
+    except KeyError:
+        days = datetime.date(year, month, 1).toordinal() - _EPOCH_ORDINAL
+        if len(_month_days) >= 4096:
+            _month_days.clear()
+        _month_days[year, month] = days
+        return days + day - 1
+
+
+def _utcoffset_microseconds(tz, fields):
+    if type(tz) is datetime.timezone:
+        offset = tz.utcoffset(None)
+    else:
+        offset = tz.utcoffset(datetime.datetime(*fields[:7]))
+    return (offset.days * 86400 + offset.seconds) * 10**6 + offset.microseconds
+
+
+def output(kind, fields, as_, tz=None):
+    """
+    Compute the representation *as_* (s. :data:`OUTPUTS`) of a value of
+    *kind* from its fields year, month, day, hour, minute, second, microsecond
+    and tzinfo (a timedelta is passed as it is) without creating the object
+    of the value. Times are taken as offsets since midnight, datetimes as UTC
+    if they are naive and *tz* is None; timezone-aware datetimes are
+    converted to UTC for 'datetime64'.
+    """
+    if kind == 'timedelta':
+        value = (fields.days * 86400 + fields.seconds) * 10**6 + fields.microseconds
+    else:
+        year, month, day, hour, minute, second, microsecond, tzinfo = fields
+        value = ((hour * 60 + minute) * 60 + second) * 10**6 + microsecond
+        if kind in ('date', 'datetime'):
+            days = _epoch_days(year, month, day)
+            if kind == 'date' and as_ == 'datetime64':
+                import numpy
+                return numpy.datetime64(days, 'D')
+            value += days * _DAY
+            tzinfo = tzinfo or (tz if kind == 'datetime' else None)
+            if tzinfo is not None:
+                value -= _utcoffset_microseconds(tzinfo, fields)
+    if as_ == 'epoch':
+        return value / 10**6
+    elif as_ == 'epoch_ns':
+        return value * 1000
+    elif as_ == 'datetime64':
+        import numpy
+        return numpy.datetime64(value, 'us')
+    elif as_ == 'timedelta64':
+        import numpy
+        return numpy.timedelta64(value, 'us')
+    raise ValueError("unknown output '%s'" % as_)
+
+
+class ParseCache(object):
+    """
+    A bounded cache of parsed values with least-recently-used eviction.
+
+    Values are looked up by their kind (s. :data:`PARSERS`), the string, the
+    :class:`TimeConfig` given to parse with, their representation
+    (s. :data:`OUTPUTS`) and any further arguments for the parser-function.
+    Values parsed with the configuration of :mod:`timeparser` are dropped
+    whenever it changes (s. :func:`config_key`), since they might be parsed
+    differently now.
+
+    The cache takes no lock: concurrent lookups may evict an entry early or
+    miscount a hit, but never return a wrong value.
+
+    :keyword int maxsize:   Maximal number of cached values; 0 disables caching.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._config = None
+        self._data = OrderedDict()
+
+    def __call__(self, kind, string, *args, config=None, as_=None, tz=None):
+        obj = self.get(kind, string, *args, config=config, as_=as_, tz=tz)
+        if obj is None:
+            raise ValueError("couldn't parse '%s' as %s" % (string, kind))
+        return obj
+
+    def get(self, kind, string, *args, config=None, as_=None, tz=None):
+        """
+        Like calling the cache but return None if *string* couldn't be parsed.
+
+        :keyword config:    :class:`TimeConfig` to parse with; the current
+                            configuration of :mod:`timeparser` if None.
+        :keyword str as_:   Representation of the value (s. :func:`output`)
+                            with *tz* as timezone of naive datetimes, or
+                            'fields' for the tuple of its fields.
+        """
+        key = (kind, string, config, as_, tz) + args
+        if config is None:
+            config = current_config()
+            if config is not self._config:
+                self._config = config
+                self._drop_global()
+        obj = self._data.get(key)
+        if obj is not None:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                pass
+            self.hits += 1
+            return obj
+        self.misses += 1
+
+        if as_ is None:
+            obj = _try_parse(kind, string, args, config)
+        else:
+            obj = _try_fields(kind, string, args, config)
+            if obj is not None and as_ != 'fields':
+                obj = output(kind, obj, as_, tz)
+
+        if obj is not None and self.maxsize and (key[2] is not None or config is self._config):
+            self._data[key] = obj
+            while len(self._data) > self.maxsize:
+                try:
+                    self._data.popitem(last=False)
+                except KeyError:
+                    break
+        return obj
+
+    def _drop_global(self):
+        for key in [k for k in list(self._data) if k[2] is None]:
+            self._data.pop(key, None)
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+
+_cache = ParseCache()
+
+
+def cache_info():
+    """
+    Return a :class:`CacheInfo` with hits, misses, maxsize and currsize of the
+    cache shared by all actions.
+    """
+    return _cache.info()
+
+
+def cache_clear():
+    """
+    Clear the cache shared by all actions and reset its statistics.
+    """
+    _cache.clear()
+
+
+def _midnight_delta(time):
+    return datetime.timedelta(hours=time.hour, minutes=time.minute,
+                              seconds=time.second, microseconds=time.microsecond)
+
+
+def to_array(kind, values):
+    """
+    Convert parsed *values* of *kind* to a :mod:`numpy`-array: dates and
+    datetimes as datetime64, times (as offsets since midnight) and timedeltas
+    as timedelta64.
+    """
+    import numpy
+    if kind in ('time', 'daytime'):
+        return numpy.array([_midnight_delta(v) for v in values], dtype='timedelta64[us]')
+    elif kind == 'timedelta':
+        return numpy.array(values, dtype='timedelta64[us]')
+    elif kind == 'date':
+        return numpy.array(values, dtype='datetime64[D]')
+    else:
+        return numpy.array(values, dtype='datetime64[us]')
+
+
+class BulkParser(object):
+    """
+    Parser for many strings of one kind ('time', 'daytime', 'date', 'datetime'
+    or 'timedelta').
+
+    The formats are detected once for every shape of string (s. :func:`shape`)
+    and reused for the following strings of that shape. Unless a
+    :class:`TimeConfig` is given as *config*, the configuration of
+    :mod:`timeparser` is read once on creation.
+    """
+    def __init__(self, kind, config=None):
+        self.kind = kind
+        self._base = 'time' if kind == 'daytime' else kind
+        self._fastpath = FASTPATHS.get(kind)
+        self._config = config or current_config()
+        self._shapes = dict()
+
+    def __call__(self, string):
+        obj = self.get(string)
+        if obj is None:
+            raise ValueError("couldn't parse '%s' as %s" % (string, self.kind))
+        return obj
+
+    def get(self, string):
+        """
+        Parse *string* or return None if it couldn't be parsed.
+        """
+        obj = self._fastpath(string, self._config) if self._fastpath else None
+        if obj is None and self._base in FORMAT_CLASSES:
+            key = shape(string)
+            try:
+                fmts = self._shapes[key]
+            except KeyError:
+                fmts = self._shapes[key] = self._config.formats(self._base, string)
+            found = lookup(self.kind, string, fmts, self._config.today)
+            obj = found and found[0]
+            if obj is None and self._base == 'datetime':
+                obj = _try_parse_aware(string, self._config)
+        elif obj is None:
+            obj = _try_parse(self._base, string, (), self._config)
+        return obj
+
+
+def parse_many(kind, iterable, as_array=False):
+    """
+    Parse all strings of *iterable* as values of *kind* ('time', 'daytime',
+    'date', 'datetime' or 'timedelta').
+
+    The formats are detected once for every shape of string
+    (s. :func:`shape`) occurring in *iterable* and reused for the remaining
+    strings of that shape. Each value is the same the Parse*-actions return.
+
+    :arg str kind:          Kind of the values.
+    :arg iterable:          Strings to be parsed.
+    :keyword bool as_array: Return a :mod:`numpy`-array (s. :func:`to_array`)
+                            instead of a list.
+
+    :raises:                ValueError, if a string couldn't been parsed
+    """
+    values = list(map(BulkParser(kind), iterable))
+    return to_array(kind, values) if as_array else values
+
+
+ERRORS = ('raise', 'skip', 'collect')
+"""Policies for lines that couldn't be parsed by :func:`iter_parse`."""
+
+
+def iter_parse(kind, lines, errors='raise', failures=None, config=None):
+    """
+    Generator parsing each line of *lines* as value of *kind*.
+
+    *lines* might be a file, which is read lazily through its buffer, or any
+    other iterable of strings. Empty lines are ignored. As with
+    :class:`ParseDatetime` a datetime-line with two words is combined from
+    a date and a time.
+
+    :arg str kind:          Kind of the values (s. :class:`BulkParser`).
+    :arg lines:             Iterable of strings.
+    :keyword str errors:    'raise' a ValueError for lines that couldn't be
+                            parsed, 'skip' them, or 'collect' them in
+                            *failures*.
+    :keyword list failures: List to collect (line-number, line)-tuples of bad
+                            lines in.
+    :keyword config:        :class:`TimeConfig` to parse with.
+    """
+    if errors not in ERRORS:
+        raise ValueError("errors must be one of %s" % ', '.join(ERRORS))
+    if kind == 'datetime':
+        dates, times = BulkParser('date', config), BulkParser('time', config)
+    bulk = BulkParser(kind, config)
+    for number, line in enumerate(lines, 1):
+        words = line.split()
+        if not words:
+            continue
+        if kind == 'datetime' and len(words) == 2:
+            date, time = dates.get(words[0]), times.get(words[1])
+            obj = None if date is None or time is None else datetime.datetime.combine(date, time)
+        else:
+            obj = bulk.get(' '.join(words))
+        if obj is not None:
+            yield obj
+        elif errors == 'raise':
+            raise ValueError("line %d: '%s' couldn't be parsed as %s"
+                             % (number, line.strip(), kind))
+        elif errors == 'collect' and failures is not None:
+            failures.append((number, line))
+
+
+class TimeStream(object):
+    """
+    Iterable of values parsed lazily from *lines* by :func:`iter_parse`.
+    Lines rejected under the 'collect'-policy are listed in :attr:`failures`.
+
+    With *owned* the stream owns the file *lines* and closes it when it is
+    read to the end or iterating is stopped, or when the stream is closed
+    (s. :meth:`close`, also used as context manager).
+    """
+    def __init__(self, kind, lines, errors='raise', config=None, owned=False):
+        self.kind = kind
+        self.lines = lines
+        self.errors = errors
+        self.config = config
+        self.owned = owned
+        self.failures = list()
+
+    def __iter__(self):
+        try:
+            for obj in iter_parse(self.kind, self.lines, self.errors, self.failures,
+                                  self.config):
+                yield obj
+        finally:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Close the file of the stream if it is owned.
+        """
+        if self.owned:
+            self.lines.close()
+
+
+def parse_value(kind, string):
+    """
+    Parse a single *string* as value of *kind* ('time', 'daytime', 'date',
+    'datetime' or 'timedelta') through the cache shared by the actions.
+
+    :raises:    ValueError, if string couldn't been parsed
+    """
+    return _cache(kind, string)
+
+
+def try_parse(kind, string):
+    """
+    Like :func:`parse_value` but return None if *string* couldn't be parsed.
+    No exception is raised on the way, which makes rejecting lots of invalid
+    strings cheap.
+    """
+    return _cache.get(kind, string)
+
+
+def parse_parallel(kind, strings, workers=None, chunksize=None, as_array=False):
+    """
+    Like :func:`parse_many` but parse *strings* in chunks on a pool of
+    *workers* processes (as many as CPUs if None). The configuration of
+    :mod:`timeparser` is carried over to the workers (s. :func:`apply_config`)
+    and the values are returned in the order of *strings*.
+
+    :arg str kind:          Kind of the values (s. :func:`parse_many`).
+    :arg strings:           Strings to be parsed.
+    :keyword int workers:   Number of processes.
+    :keyword int chunksize: Number of strings per chunk; by default the
+                            strings are split in four chunks per worker.
+    :keyword bool as_array: Return a :mod:`numpy`-array (s. :func:`to_array`).
+
+    :raises:                ValueError, if a string couldn't been parsed
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    strings = list(strings)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(strings) < 2:
+        return parse_many(kind, strings, as_array)
+
+    chunksize = chunksize or -(-len(strings) // (workers * 4))
+    chunks = [strings[i:i+chunksize] for i in range(0, len(strings), chunksize)]
+    with ProcessPoolExecutor(workers, initializer=apply_config,
+                             initargs=(config_key(),)) as executor:
+        values = [v for chunk in executor.map(functools.partial(parse_many, kind), chunks)
+                  for v in chunk]
+    return to_array(kind, values) if as_array else values
+
+
+async def aparse(kind, string):
+    """
+    Coroutine-version of :func:`parse_value` for asyncio-services. Parsing a
+    single value takes only microseconds and is done directly in the
+    event-loop.
+
+    :raises:    ValueError, if string couldn't been parsed
+    """
+    return parse_value(kind, string)
+
+
+async def aparse_many(kind, strings, chunksize=1000, limit=4, semaphore=None,
+                      executor=None):
+    """
+    Coroutine-version of :func:`parse_many`, which doesn't block the
+    event-loop with large batches.
+
+    Batches of up to *chunksize* strings are parsed directly. Larger ones are
+    split into chunks, which are parsed by :func:`parse_many` in *executor*
+    (the default-executor of the loop if None). At most *limit* chunks are
+    parsed at once; pass an :class:`asyncio.Semaphore` as *semaphore* to share
+    that limit between calls.
+
+    :raises:    ValueError, if a string couldn't been parsed
+    """
+    import asyncio
+    strings = list(strings)
+    if len(strings) <= chunksize:
+        return parse_many(kind, strings)
+
+    loop = asyncio.get_running_loop()
+    semaphore = semaphore or asyncio.Semaphore(limit)
+
+    async def parse_chunk(chunk):
+        async with semaphore:
+            return await loop.run_in_executor(executor, parse_many, kind, chunk)
+
+    chunks = await asyncio.gather(*[
+        parse_chunk(strings[i:i+chunksize])
+        for i in range(0, len(strings), chunksize)
+        ])
+    return [value for chunk in chunks for value in chunk]
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_DAY = 86400 * 10**6
+
+
+def _midnight_microseconds(t):
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 10**6 + t.microsecond
+
+
+def _from_midnight_microseconds(make, value):
+    seconds, microsecond = divmod(value, 10**6)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return make(hour, minute, second, microsecond)
+
+
+class CompactTimes(Sequence):
+    """
+    Memory-saving sequence of values of one kind, which are stored as 64-bit
+    integers in an :class:`array.array`: datetimes as microseconds since the
+    epoch (1970-01-01), dates as days since the epoch, times and daytimes as
+    microseconds since midnight and timedeltas as microseconds. The objects
+    are only created when they are accessed. Timezone-aware datetimes are
+    rejected with a ValueError unless *utc* is True; then they are stored in
+    UTC and come back as naive datetimes in UTC.
+
+    The array is available as :attr:`data` and supports the buffer-protocol;
+    :meth:`to_numpy` returns a view on it without copying.
+
+    :arg str kind:      'datetime', 'date', 'time', 'daytime' or 'timedelta'.
+    :arg iterable:      Initial values.
+    :arg bool utc:      Convert timezone-aware datetimes to naive UTC.
+    """
+    DTYPES = dict(
+        datetime = 'datetime64[us]',
+        date = 'datetime64[D]',
+        time = 'timedelta64[us]',
+        daytime = 'timedelta64[us]',
+        timedelta = 'timedelta64[us]',
+        )
+
+    def __init__(self, kind, iterable=(), utc=False):
+        if kind not in self.DTYPES:
+            raise ValueError("unsupported kind '%s'" % kind)
+        self.kind = kind
+        self.utc = utc
+        self.data = array.array('q')
+        self.extend(iterable)
+
+    def encode(self, obj):
+        if self.kind == 'datetime':
+            offset = obj.utcoffset()
+            if offset is not None:
+                if not self.utc:
+                    raise ValueError("can't store the timezone-aware datetime %s "
+                                     "without utc=True" % obj)
+                obj = obj.replace(tzinfo=None) - offset
+            return ((obj.toordinal() - _EPOCH_ORDINAL) * _DAY
+                    + _midnight_microseconds(obj))
+        elif self.kind == 'date':
+            return obj.toordinal() - _EPOCH_ORDINAL
+        elif self.kind == 'timedelta':
+            return (obj.days * 86400 + obj.seconds) * 10**6 + obj.microseconds
+        else:
+            return _midnight_microseconds(obj)
+
+    def decode(self, value):
+        if self.kind == 'datetime':
+            return _EPOCH + datetime.timedelta(microseconds=value)
+        elif self.kind == 'date':
+            return datetime.date.fromordinal(value + _EPOCH_ORDINAL)
+        elif self.kind == 'timedelta':
+            return datetime.timedelta(microseconds=value)
+        elif self.kind == 'daytime':
+            return _from_midnight_microseconds(make_daytime, value)
+        else:
+            return _from_midnight_microseconds(datetime.time, value)
+
+    def append(self, obj):
+        self.data.append(self.encode(obj))
+
+    def extend(self, iterable):
+        self.data.extend([self.encode(obj) for obj in iterable])
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            items = self.__class__(self.kind, utc=self.utc)
+            items.data = self.data[index]
+            return items
+        return self.decode(self.data[index])
+
+    def __iter__(self):
+        return map(self.decode, self.data)
+
+    def __eq__(self, other):
+        if isinstance(other, CompactTimes):
+            return self.kind == other.kind and self.data == other.data
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (self.__class__.__name__, self.kind, list(self))
+
+    def to_numpy(self):
+        """
+        Return a :mod:`numpy`-array of dtype datetime64 or timedelta64 sharing
+        the memory of :attr:`data`. Mind that :attr:`data` cannot grow while
+        the array exists.
+        """
+        import numpy
+        return numpy.frombuffer(self.data, dtype='int64').view(self.DTYPES[self.kind])
+
+
+class TimeIndex(Sequence):
+    """
+    Sorted sequence of values of one kind with range-queries in O(log n).
+    For times and daytimes the queries wrap past midnight.
+
+    :arg str kind:      'datetime', 'date', 'time', 'daytime' or 'timedelta'.
+    :arg iterable:      Initial values.
+
+    usage:
+        >>> import datetime
+        >>> import timeparse
+        >>> index = timeparse.TimeIndex('time', [datetime.time(h) for h in (1, 8, 23)])
+        >>> index.between(datetime.time(22), datetime.time(2))
+        [datetime.time(23, 0), datetime.time(1, 0)]
+        >>> index.next_after(datetime.time(23, 30))
+        datetime.time(1, 0)
+    """
+    def __init__(self, kind, iterable=()):
+        self.kind = kind
+        self.values = sorted(iterable)
+        self.wraps = kind in ('time', 'daytime')
+
+    def append(self, obj):
+        bisect.insort(self.values, obj)
+
+    def extend(self, iterable):
+        for obj in iterable: self.append(obj)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __contains__(self, obj):
+        index = bisect.bisect_left(self.values, obj)
+        return index < len(self.values) and self.values[index] == obj
+
+    def index(self, obj):
+        index = bisect.bisect_left(self.values, obj)
+        if index == len(self.values) or self.values[index] != obj:
+            raise ValueError("%r is not in index" % (obj,))
+        return index
+
+    def count(self, obj):
+        return bisect.bisect_right(self.values, obj) - bisect.bisect_left(self.values, obj)
+
+    def __eq__(self, other):
+        if isinstance(other, TimeIndex):
+            return self.values == other.values
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (self.__class__.__name__, self.kind, self.values)
+
+    def between(self, start, stop):
+        """
+        Return the values from *start* to *stop* (both inclusive). For times
+        a *start* later than *stop* means a range past midnight.
+        """
+        values = self.values
+        first = bisect.bisect_left(values, start)
+        last = bisect.bisect_right(values, stop)
+        if self.wraps and start > stop:
+            return values[first:] + values[:last]
+        return values[first:last]
+
+    def next_after(self, obj):
+        """
+        Return the first value later than *obj* or None. For times the first
+        value of the next day is returned if there is none later.
+        """
+        index = bisect.bisect_right(self.values, obj)
+        if index < len(self.values):
+            return self.values[index]
+        elif self.wraps and self.values:
+            return self.values[0]
+
+    def nearest(self, obj):
+        """
+        Return the value nearest to *obj* or None if the index is empty. For
+        times the distance is measured across midnight as well.
+        """
+        values = self.values
+        if not values:
+            return None
+        index = bisect.bisect_left(values, obj)
+        if self.wraps:
+            before, after = values[index - 1], values[index % len(values)]
+        else:
+            before = values[max(index - 1, 0)]
+            after = values[min(index, len(values) - 1)]
+        return before if self.distance(before, obj) <= self.distance(after, obj) else after
+
+    def distance(self, a, b):
+        if self.wraps:
+            delta = abs(_midnight_microseconds(a) - _midnight_microseconds(b))
+            return min(delta, _DAY - delta)
+        return abs(a - b)
+
+
+class DatetimeRange(object):
+    """
+    Lazy range of datetimes (or dates) from *start* to *stop* (inclusive) in
+    steps of *step*. Nothing is materialized: :func:`len`, ``in``, indexing
+    and slicing are computed arithmetically. Without *stop* the range is
+    unbounded and has no :func:`len`.
+
+    :arg start:         First value.
+    :arg stop:          Last possible value or None.
+    :arg step:          :class:`datetime.timedelta` (must not be zero).
+
+    usage:
+        >>> import datetime
+        >>> import timeparse
+        >>> window = timeparse.DatetimeRange(
+        ... datetime.datetime(2013, 4, 22, 8),
+        ... datetime.datetime(2013, 4, 23, 18),
+        ... datetime.timedelta(minutes=15))
+        >>> len(window)
+        137
+        >>> window[-1]
+        datetime.datetime(2013, 4, 23, 18, 0)
+    """
+    def __init__(self, start, stop=None, step=datetime.timedelta(days=1)):
+        if not step:
+            raise ValueError("step must not be zero")
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+    def __len__(self):
+        if self.stop is None:
+            raise TypeError("unbounded range has no len()")
+        return max((self.stop - self.start) // self.step + 1, 0)
+
+    def __bool__(self):
+        return self.stop is None or len(self) > 0
+
+    def __contains__(self, obj):
+        try:
+            offset = obj - self.start
+            if offset % self.step: return False
+        except TypeError:
+            return False
+        index = offset // self.step
+        return index >= 0 and (self.stop is None or index < len(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if self.stop is None:
+                raise TypeError("unbounded range can't be sliced")
+            indices = range(len(self))[index]
+            start = self.start + indices.start * self.step
+            step = self.step * indices.step
+            stop = self.start + indices[-1] * self.step if indices else start - step
+            return self.__class__(start, stop, step)
+        if index < 0:
+            if self.stop is None:
+                raise IndexError("unbounded range has no end")
+            index += len(self)
+        if index < 0 or (self.stop is not None and index >= len(self)):
+            raise IndexError("range index out of range")
+        return self.start + index * self.step
+
+    def __iter__(self):
+        value = self.start
+        indices = count() if self.stop is None else range(len(self))
+        for _ in indices:
+            yield value
+            value += self.step
+
+    def index(self, obj):
+        if obj not in self:
+            raise ValueError("%r is not in range" % (obj,))
+        return (obj - self.start) // self.step
+
+    def count(self, obj):
+        return int(obj in self)
+
+    def __eq__(self, other):
+        if not isinstance(other, DatetimeRange):
+            return NotImplemented
+        if self.stop is None or other.stop is None:
+            return (self.start, self.stop, self.step) == (other.start, other.stop, other.step)
+        if not len(self) or not len(other):
+            return len(self) == len(other)
+        return (self.start, self.step, len(self)) == (other.start, other.step, len(other))
 
-__version__ = '0.5.5'
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return '%s(%r, %r, %r)' % (self.__class__.__name__, self.start, self.stop, self.step)
+
+
+Sequence.register(DatetimeRange)
+
+
+CONTAINERS = (None, 'list', 'compact', 'compact_utc', 'index')
+ORDERS = (None, 'sorted', 'unique')
+
+
+class Accumulator(object):
+    """
+    Collects the values of an Append*-action for one namespace.
+
+    Like :class:`argparse._AppendAction` the existing value (e.g. the default)
+    is copied instead of being modified, but only once when the accumulator
+    is created and not for each value.
+
+    :arg items:             Existing value or None.
+    :arg str container:     'compact' for a :class:`CompactTimes`
+                            ('compact_utc' converts timezone-aware
+                            datetimes to UTC), 'index'
+                            for a :class:`TimeIndex` (always sorted),
+                            otherwise a list is used.
+    :arg str order:         'sorted' keeps the values sorted, 'unique' also
+                            drops duplicates.
+    :arg str kind:          Kind of the values.
+    """
+    def __init__(self, items=None, container=None, order=None, kind=None):
+        values = [] if items is None else list(items)
+        if container == 'index':
+            order = order or 'sorted'
+        if order:
+            values.sort()
+        if order == 'unique':
+            values = [value for value, _ in groupby(values)]
+        if container in ('compact', 'compact_utc'):
+            self.items = CompactTimes(kind, values, container == 'compact_utc')
+            self.target, self.encode = self.items.data, self.items.encode
+        elif container == 'index':
+            self.items = TimeIndex(kind, values)
+            self.target, self.encode = self.items.values, None
+        else:
+            self.items = values
+            self.target, self.encode = values, None
+        self.order = order
+
+    def append(self, obj):
+        if not self.order:
+            self.items.append(obj)
+            return
+        value = obj if self.encode is None else self.encode(obj)
+        target = self.target
+        index = bisect.bisect_right(target, value)
+        if self.order == 'unique' and index and target[index - 1] == value:
+            return
+        target.insert(index, value)
+
+    def extend(self, objs):
+        if not self.order:
+            self.items.extend(objs)
+        else:
+            for obj in objs: self.append(obj)
+
+
+class FormatLock(object):
+    """
+    Remembers the format the first value of each kind had to be searched with
+    and tries it first for all following values of that kind. Only if the
+    locked format doesn't match the full search is done.
+
+    Values recognized by :data:`FASTPATHS` never need a format and therefore
+    neither use nor lock one.
+
+    :attr dict formats:     The locked format for each kind; daytimes share
+                            the format of times.
+    :keyword config:        :class:`TimeConfig` to parse with; the current
+                            configuration of :mod:`timeparser` if None.
+    """
+    def __init__(self, config=None):
+        self.formats = dict()
+        self.config = config
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.formats)
+
+    def __call__(self, kind, string, *args):
+        obj = self.get(kind, string, *args)
+        if obj is None:
+            raise ValueError("couldn't parse '%s' as %s" % (string, kind))
+        return obj
+
+    def get(self, kind, string, *args):
+        """
+        Like calling the lock but return None if *string* couldn't be parsed.
+        """
+        config = self.config or current_config()
+        base = 'time' if kind == 'daytime' else kind
+        if base not in FORMAT_CLASSES:
+            return _try_parse(kind, string, args, config)
+        locked = self.formats.get(base)
+        if locked is not None:
+            found = lookup(kind, string, (locked,), config.today)
+            if found is not None:
+                return found[0]
+        fastpath = FASTPATHS.get(kind)
+        obj = fastpath(string, config) if fastpath else None
+        if obj is not None:
+            return obj
+        found = lookup(kind, string, config.formats(base, string), config.today)
+        if found is None:
+            return _try_parse_aware(string, config) if kind == 'datetime' else None
+        self.formats.setdefault(base, found[1])
+        return found[0]
+
+
+ParseEvent = namedtuple('ParseEvent', 'action dest values seconds error')
+"""
+Event passed to the observer (s. :func:`set_observer`) for each call of an
+action. *error* is the kind the values failed to be parsed as or None.
+"""
+
+
+class Monitor(object):
+    """
+    Collects call-counts, parse-times and failures of the actions while
+    :attr:`enabled` and passes a :class:`ParseEvent` to :attr:`observer` for
+    each call.
+
+    :keyword int samples:   Number of most recent parse-times per action the
+                            percentiles are computed of.
+    """
+    def __init__(self, samples=1000):
+        self.enabled = False
+        self.observer = None
+        self.samples = samples
+        self._stats = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, call, action, parser, namespace, values, option_string):
+        error = None
+        start = time.perf_counter()
+        try:
+            result = call(action, parser, namespace, values, option_string)
+        except ArgumentError as err:
+            error = getattr(err, 'kind', None) or 'error'
+            raise
+        else:
+            # actions in validate_only-mode return the kind of invalid values
+            error = result
+            return result
+        finally:
+            seconds = time.perf_counter() - start
+            self.record(action, values, seconds, error)
+
+    def record(self, action, values, seconds, error):
+        name = '%s:%s' % (action.__class__.__name__, action.dest)
+        with self._lock:
+            try:
+                stats = self._stats[name]
+            except KeyError:
+                stats = self._stats[name] = dict(
+                    calls=0, seconds=0.0, failures=dict(),
+                    times=deque(maxlen=self.samples))
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['times'].append(seconds)
+            if error:
+                stats['failures'][error] = stats['failures'].get(error, 0) + 1
+        if self.observer is not None:
+            self.observer(ParseEvent(name, action.dest, values, seconds, error))
+
+    def snapshot(self):
+        def percentile(times, p):
+            return times[min(len(times) - 1, int(len(times) * p))] if times else None
+        snapshot = dict()
+        with self._lock:
+            for name, stats in self._stats.items():
+                times = sorted(stats['times'])
+                snapshot[name] = dict(
+                    calls=stats['calls'],
+                    seconds=stats['seconds'],
+                    p50=percentile(times, 0.5),
+                    p99=percentile(times, 0.99),
+                    failures=dict(stats['failures']),
+                    )
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_monitor = Monitor()
+
+
+def enable_stats(enabled=True):
+    """
+    Switch the instrumentation of all actions on or off. While off the
+    actions don't take any measurements.
+    """
+    _monitor.enabled = enabled
+
+
+def set_observer(observer):
+    """
+    Set a callable, which gets a :class:`ParseEvent` for each call of an
+    action, e.g. to forward it to a metrics-system. Setting an observer enables
+    the instrumentation; None removes the observer again.
+    """
+    _monitor.observer = observer
+    if observer is not None:
+        _monitor.enabled = True
+
+
+def stats():
+    """
+    Return a snapshot of the statistics collected while the instrumentation
+    was enabled: a dict mapping 'ActionClass:dest' to a dict with the number of
+    *calls*, the cumulative *seconds*, the *p50* and *p99* of the parse-times
+    in seconds and the number of *failures* for each kind of value.
+    """
+    return _monitor.snapshot()
+
+
+def stats_reset():
+    """
+    Discard all collected statistics.
+    """
+    _monitor.reset()
+
+
+def _instrument(call):
+    @functools.wraps(call)
+    def __call__(self, parser, namespace, values, option_string=None):
+        if self.relative:
+            capture_anchor(namespace)
+        if not _monitor.enabled:
+            return call(self, parser, namespace, values, option_string)
+        return _monitor.observe(call, self, parser, namespace, values, option_string)
+    return __call__
+
+
+INVALID = 'invalid_values'
+"""
+Namespace-attribute collecting the invalid values of actions in
+validate_only-mode (s. :class:`TimeArgsMixin`).
+"""
+
+
+class TimeArgsMixin(object):
+    """
+    Common base of all actions.
 
+    :keyword bool lock_format:  Lock the format of the first parsed value and
+                                try it first for all further values
+                                (s. :class:`FormatLock`). The lock is
+                                available as :attr:`format_lock`.
+    :keyword str container:     Only for the Append*-actions (except
+                                :class:`AppendTimeOrDatetime`): 'compact'
+                                collects the values in a :class:`CompactTimes`
+                                instead of a list ('compact_utc' stores
+                                timezone-aware datetimes in UTC instead of
+                                rejecting them), 'index' in a sorted
+                                :class:`TimeIndex` for range-queries.
+    :keyword str order:         Only for the Append*-actions (except
+                                :class:`AppendTimeOrDatetime`): 'sorted' keeps
+                                the values sorted, 'unique' also drops
+                                duplicates (s. :class:`Accumulator`).
+    :keyword bool validate_only:    Don't raise an error for invalid values,
+                                    but collect them as (dest, values) in the
+                                    list *invalid_values* of the namespace
+                                    (s. :data:`INVALID`).
+    :keyword config:            :class:`TimeConfig` to parse with instead of
+                                the global configuration of :mod:`timeparser`.
+                                Pass the same config to all actions of a
+                                parser to configure the parser as a whole.
+    :keyword default_tz:        Only for the datetime-actions: timezone of
+                                datetimes given without one, as
+                                :class:`datetime.tzinfo` or name
+                                (s. :func:`resolve_tz`). By default such
+                                datetimes stay naive. The time- and
+                                date-actions accept it together with
+                                *relative* as the timezone of 'now'.
 
-class TimeArgsMixin:
+    :keyword bool relative:     Only for the time-, date- and datetime-actions:
+                                accept relative expressions like 'now',
+                                'yesterday 18:00', '-2h' or 'last monday'
+                                (s. :func:`parse_relative`). They refer to
+                                the same moment for all arguments of a call of
+                                parse_args (s. :func:`capture_anchor`).
+                                Mind that argparse takes '-2h' for an option,
+                                so negative offsets are given as '--since=-2h'.
+    :keyword str as_:           Representation of the values (s.
+                                :data:`OUTPUTS` and :data:`OUTPUT_KINDS`):
+                                'datetime' (the default) for the objects,
+                                'epoch' for seconds as float, 'epoch_ns' for
+                                nanoseconds as int (since the epoch resp.
+                                midnight), 'datetime64' or 'timedelta64' for
+                                :mod:`numpy`-scalars. The representation is
+                                computed directly from the parsed fields
+                                (s. :func:`output`); relative datetimes
+                                without *default_tz* are taken as local time.
+                                Not for ranges, streams and the
+                                TimeOrDatetime-actions.
+
+    Datetimes might be given with a timezone (s. :func:`split_tz`), e.g.
+    '2013-04-24T23:22:00+02:00', '24.4.13 23:22Z' or '24.4.13 23:22
+    Europe/Berlin', and are parsed as timezone-aware datetimes then.
+
+    Values are parsed without raising an exception (s. :func:`try_parse`),
+    only values that turn out to be invalid lead to an
+    :class:`argparse.ArgumentError`.
+
+    The __call__ of each action is instrumented (s. :func:`enable_stats`).
+    """
     ERR = "'%s' couldn't be parsed as %s"
+    MIXED = "'%s' can't be added: cannot mix naive and aware datetimes in a %s container"
+    AWARE = ("'%s' can't be added: the compact container stores naive datetimes "
+             "only (s. container='compact_utc')")
+    KIND = None
+    VALUE_KIND = None
+    UNSUPPORTED = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super(TimeArgsMixin, cls).__init_subclass__(**kwargs)
+        if '__call__' in cls.__dict__:
+            cls.__call__ = _instrument(cls.__dict__['__call__'])
+
+    def __init__(self, option_strings, dest, lock_format=False, container=None,
+                 order=None, validate_only=False, config=None, default_tz=None,
+                 relative=False, as_=None, **kwargs):
+        given = dict(container=container, order=order,
+                     as_=None if as_ == 'datetime' else as_,
+                     # relative expressions are evaluated in the default_tz
+                     default_tz=None if relative else default_tz,
+                     relative=relative, lock_format=lock_format)
+        for option in self.UNSUPPORTED:
+            if given[option]:
+                raise ValueError("%s doesn't support %s" % (self.__class__.__name__, option))
+        if container not in CONTAINERS:
+            raise ValueError("unknown container '%s'" % container)
+        if order not in ORDERS:
+            raise ValueError("order must be one of %s" % ', '.join(map(str, ORDERS)))
+        if (container not in (None, 'list') or order) and self.KIND is None:
+            raise ValueError("%s doesn't support container '%s' or order '%s'"
+                             % (self.__class__.__name__, container, order))
+        if config is not None and not isinstance(config, TimeConfig):
+            raise ValueError("config must be a TimeConfig")
+        if as_ is not None and as_ not in OUTPUTS:
+            raise ValueError("as_ must be one of %s" % ', '.join(OUTPUTS))
+        if as_ not in (None, 'datetime'):
+            if as_ not in OUTPUT_KINDS.get(self.KIND or self.VALUE_KIND, ()):
+                raise ValueError("%s doesn't support as_='%s'"
+                                 % (self.__class__.__name__, as_))
+            if container not in (None, 'list'):
+                raise ValueError("container '%s' doesn't support as_='%s'"
+                                 % (container, as_))
+            if as_ in ('datetime64', 'timedelta64'):
+                import numpy  # fail on creation if numpy isn't installed
+            self.as_ = as_
+        else:
+            self.as_ = None
+        self.format_lock = FormatLock(config) if lock_format else None
+        self.config = config
+        if isinstance(default_tz, str):
+            name, default_tz = default_tz, resolve_tz(default_tz)
+            if default_tz is None:
+                raise ValueError("unknown timezone '%s'" % name)
+        self.default_tz = default_tz
+        self.relative = relative
+        self.collection = container
+        self.order = order
+        self.validate_only = validate_only
+        self._accumulator = None
+        super(TimeArgsMixin, self).__init__(option_strings, dest, **kwargs)
+
+    def error(self, values, kind, message=None):
+        """
+        Return an :class:`argparse.ArgumentError` for *values* that couldn't be
+        parsed as *kind* or with *message* instead of :attr:`ERR`.
+        """
+        err = ArgumentError(self, message or self.ERR % (values, kind))
+        err.kind = kind
+        return err
+
+    def invalid(self, namespace, values, kind, message=None):
+        """
+        Handle *values* that couldn't be parsed as *kind*: raise an
+        :class:`argparse.ArgumentError` (s. :meth:`error`) or in
+        validate_only-mode record them in the namespace and return *kind*.
+        """
+        if not self.validate_only:
+            raise self.error(values, kind, message)
+        invalid = getattr(namespace, INVALID, None)
+        if invalid is None:
+            invalid = list()
+            setattr(namespace, INVALID, invalid)
+        invalid.append((self.dest, values))
+        return kind
+
+    def parse(self, kind, string, *args):
+        if self.format_lock is not None:
+            return self.format_lock(kind, string, *args)
+        return _cache(kind, string, *args, config=self.config)
+
+    def try_parse(self, kind, string, *args):
+        """
+        Like :meth:`parse` but return None if *string* couldn't be parsed.
+        """
+        if self.as_ is not None and (self.relative or self.format_lock is not None):
+            fields = self.try_fields(kind, string, *args)
+            return None if fields is None else self.output(kind, fields)
+        if self.relative:
+            obj = self.parse_relative(kind, string)
+            if obj is not None:
+                return obj
+        if self.format_lock is not None:
+            return self.format_lock.get(kind, string, *args)
+        return _cache.get(kind, string, *args, config=self.config, as_=self.as_,
+                          tz=self.default_tz)
+
+    def try_fields(self, kind, string, *args):
+        """
+        Like :meth:`try_parse` but return the fields of the value
+        (s. :func:`output`).
+        """
+        if self.relative:
+            obj = self.parse_relative(kind, string)
+            if kind == 'datetime' and obj is not None and obj.tzinfo is None:
+                # a naive anchor is local time, but naive fields are taken as utc
+                obj = obj.astimezone()
+            if obj is not None:
+                return _fields_of(obj)
+        if self.format_lock is not None:
+            obj = self.format_lock.get(kind, string, *args)
+            return None if obj is None else _fields_of(obj)
+        return _cache.get(kind, string, *args, config=self.config, as_='fields')
+
+    def output(self, kind, fields):
+        """
+        Return the representation :attr:`as_` of the value of *kind* with
+        *fields* (s. :func:`output`).
+        """
+        return output(kind, fields, self.as_, self.default_tz)
+
+    def parse_relative(self, kind, string):
+        """
+        Evaluate *string* as relative expression (s. :func:`parse_relative`)
+        in :attr:`default_tz` or local time or return None. Strings without
+        a sign or a letter, which could only be a time, are taken as
+        relative datetimes only.
+        """
+        if (string[:1] not in _RELATIVE_START and _RE.letter.search(string) is None
+                and (kind != 'datetime' or _RE.time.match(string) is None)):
+            return None
+        return parse_relative(kind, string, anchor(self.default_tz))
+
+    def parse_each(self, kind, values):
+        """
+        Parse a single string or each string of a list as *kind* or return
+        None if any of them couldn't be parsed.
+        """
+        if type(values) == str:
+            return self.try_parse(kind, values)
+        objs = [self.try_parse(kind, value) for value in values]
+        return None if None in objs else objs
 
     def combine_datetime(self, datestring, timestring):
-        date = timeparser.parsedate(datestring)
-        time = timeparser.parsetime(timestring)
-        return datetime.datetime.combine(date, time)
+        tz = None
+        if '+' in timestring or '-' in timestring or timestring.endswith('Z'):
+            timestring, tz = split_tz(timestring)
+        if self.as_ is not None:
+            date = self.try_fields('date', datestring)
+            time = self.try_fields('time', timestring)
+            if date is None or time is None:
+                return None
+            return self.output('datetime', date[:3] + time[3:7] + (tz,))
+        date = self.try_parse('date', datestring)
+        time = self.try_parse('time', timestring)
+        if date is None or time is None:
+            return None
+        return datetime.datetime.combine(date, time, tz)
+
+    def parse_pair(self, values):
+        """
+        Parse a date and a time or a datetime and a timezone-word
+        (s. :func:`resolve_tz`) given as two values.
+        """
+        if values[1][:1].isdigit() or resolve_tz(values[1]) is None:
+            return self.combine_datetime(*values)
+        return self.try_parse('datetime', ' '.join(values))
+
+    def parse_datetime(self, values):
+        values = values if isinstance(values, list) else [values]
+        if self.relative:
+            obj = self.parse_relative('datetime', ' '.join(values))
+            if obj is not None and self.as_ is not None:
+                return self.output('datetime', _fields_of(obj))
+            elif obj is not None:
+                return obj
+        if len(values) == 2:
+            return self.parse_pair(values)
+        else:
+            return self.try_parse('datetime', ' '.join(values))
+
+    def localize(self, obj):
+        """
+        Attach :attr:`default_tz` to the naive datetime *obj*.
+        """
+        if obj is None or obj.tzinfo is not None or self.default_tz is None:
+            return obj
+        return obj.replace(tzinfo=self.default_tz)
+
+    def datetime_plan(self):
+        """
+        Return the function parsing the values of a datetime-action. It is
+        chosen once by *nargs*, so the values needn't be inspected per call.
+        The function returns None for invalid values.
+        """
+        if self.nargs in (None, '?'):
+            plan = functools.partial(self.try_parse, 'datetime')
+        elif self.nargs == 1:
+            plan = lambda values: self.try_parse('datetime', values[0])
+        elif self.nargs == 2 and not self.relative:
+            plan = self.parse_pair
+        else:
+            plan = self.parse_datetime
+        if self.default_tz is None or self.as_ is not None:
+            # the representations include the default_tz already
+            return plan
+        return lambda values: self.localize(plan(values))
 
     def time_or_datetime(self, values):
         if len(values) == 1:
-            return timeparser.parsetime(values[0])
+            return self.try_parse('time', values[0])
         elif len(values) == 2:
-            return self.combine_datetime(*values)
+            return self.localize(self.combine_datetime(*values))
         else:
-            raise ValueError("'%s' couldn't be parsed as time or datetime" % values)
+            return None
 
-    def append(self, namespace, obj):
-        if getattr(namespace, self.dest):
-            getattr(namespace, self.dest).append(obj)
+    def accumulator(self, namespace):
+        """
+        Return the :class:`Accumulator` of *namespace*. A new one is attached
+        if the value of the namespace isn't the one collected by this action
+        (e.g. for the first value of a parse).
+        """
+        items = getattr(namespace, self.dest, None)
+        accumulator = self._accumulator
+        if accumulator is None or accumulator.items is not items:
+            accumulator = Accumulator(items, self.collection, self.order, self.KIND)
+            setattr(namespace, self.dest, accumulator.items)
+            self._accumulator = accumulator
+        return accumulator
+
+    def append(self, namespace, obj, values=None):
+        """
+        Add *obj* parsed from *values* to the values of *namespace*. An obj,
+        which can't be compared to the values of a sorted container (a naive
+        and an aware datetime) or can't be stored in a compact container (an
+        aware datetime), is handled as invalid (s. :meth:`invalid`).
+        """
+        accumulator = self.accumulator(namespace)
+        values = obj if values is None else values
+        try:
+            accumulator.append(obj)
+        except TypeError:
+            message = self.MIXED % (values, accumulator.order)
+        except ValueError:
+            message = self.AWARE % values
         else:
-            setattr(namespace, self.dest, [obj])
+            return None
+        return self.invalid(namespace, values, self.KIND, message)
+
+    def extend(self, namespace, objs, values=None):
+        """
+        Like :meth:`append` for each of *objs* parsed from the corresponding
+        item of *values*.
+        """
+        accumulator = self.accumulator(namespace)
+        if not accumulator.order and accumulator.encode is None:
+            return accumulator.extend(objs)
+        for obj, value in zip(objs, objs if values is None else values):
+            invalid = self.append(namespace, obj, value)
+            if invalid is not None:
+                return invalid
 
+    def batch(self, parser, namespace, occurrences):
+        """
+        Handle the values of all *occurrences* of an Append*-action at once,
+        with the same outcome as calling the action for each of them. Each
+        distinct value is converted only once (s. :class:`TimeArgumentParser`).
+        Each occurrence is recorded as a call by the instrumentation
+        (s. :func:`enable_stats`).
+        """
+        if self.relative:
+            capture_anchor(namespace)
+        monitor = _monitor if _monitor.enabled else None
+        converted = dict()
+        objs = list()
+        valid = list()
+        for values in occurrences:
+            start = monitor and time.perf_counter()
+            key = values if isinstance(values, str) else tuple(values)
+            obj = converted.get(key)
+            if obj is None:
+                obj = converted[key] = self.convert(values)
+                if obj is None:
+                    # let the action report the invalid value
+                    self.extend(namespace, objs, valid)
+                    return self(parser, namespace, values)
+            objs.append(obj)
+            valid.append(values)
+            if monitor:
+                monitor.record(self, values, time.perf_counter() - start, None)
+        self.extend(namespace, objs, valid)
 
 
-class ParseTime(argparse.Action, TimeArgsMixin):
+
+class ParseTime(TimeArgsMixin, argparse.Action):
     """
     Action for :meth:`argparse.ArgumentParser.add_argument` to parse
     cmdline-parameters as :class:`datetime.time`.
@@ -54,19 +2760,17 @@ class ParseTime(argparse.Action, TimeArgsMixin):
         >>> parser.parse_args('--time 23:20:33'.split()).time
         datetime.time(23, 20, 33)
     """
+    VALUE_KIND = 'time'
+    UNSUPPORTED = ('default_tz',)
+
     def __call__(self, parser, namespace, values, option_string=None):
-        try:
-            if type(values) == str:
-                time = timeparser.parsetime(values)
-            else:
-                time = [timeparser.parsetime(d) for d in values]
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'time'))
-        else:
-            setattr(namespace, self.dest, time)
+        time = self.parse_each('time', values)
+        if time is None:
+            return self.invalid(namespace, values, 'time')
+        setattr(namespace, self.dest, time)
 
 
-class ParseDaytime(argparse.Action, TimeArgsMixin):
+class ParseDaytime(TimeArgsMixin, argparse.Action):
     """
     Action for :meth:`argparse.ArgumentParser.add_argument` to parse
     cmdline-parameters as :class:`datetime.time`.
@@ -83,19 +2787,17 @@ class ParseDaytime(argparse.Action, TimeArgsMixin):
         >>> parser.parse_args('--daytime 23:20:33'.split()).daytime
         Daytime(23, 20, 33)
     """
+    VALUE_KIND = 'daytime'
+    UNSUPPORTED = ('default_tz',)
+
     def __call__(self, parser, namespace, values, option_string=None):
-        try:
-            if type(values) == str:
-                daytime = Daytime.fromtime(timeparser.parsetime(values))
-            else:
-                daytime = [Daytime.fromtime(timeparser.parsetime(d)) for d in values]
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'daytime'))
-        else:
-            setattr(namespace, self.dest, daytime)
+        daytime = self.parse_each('daytime', values)
+        if daytime is None:
+            return self.invalid(namespace, values, 'daytime')
+        setattr(namespace, self.dest, daytime)
 
 
-class ParseDate(argparse.Action, TimeArgsMixin):
+class ParseDate(TimeArgsMixin, argparse.Action):
     """
     Action for :meth:`argparse.ArgumentParser.add_argument` to parse
     cmdline-parameters as :class:`datetime.date`.
@@ -112,19 +2814,17 @@ class ParseDate(argparse.Action, TimeArgsMixin):
         >>> parser.parse_args('--date 24/04/2013'.split()).date
         datetime.date(2013, 4, 24)
     """
+    VALUE_KIND = 'date'
+    UNSUPPORTED = ('default_tz',)
+
     def __call__(self, parser, namespace, values, option_string=None):
-        try:
-            if type(values) == str:
-                date = timeparser.parsedate(values)
-            else:
-                date = [timeparser.parsedate(d) for d in values]
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'date'))
-        else:
-            setattr(namespace, self.dest, date)
+        date = self.parse_each('date', values)
+        if date is None:
+            return self.invalid(namespace, values, 'date')
+        setattr(namespace, self.dest, date)
 
 
-class ParseTimedelta(argparse.Action, TimeArgsMixin):
+class ParseTimedelta(TimeArgsMixin, argparse.Action):
     """
     Action for :meth:`argparse.ArgumentParser.add_argument` to parse
     cmdline-parameters as :class:`datetime.timedelta`.
@@ -152,23 +2852,29 @@ class ParseTimedelta(argparse.Action, TimeArgsMixin):
     The values could be flagged with some letters matching those kwargs.
     In the first exemple above the values are interpreted as 20 days, 12 hours
     and 4 min. In the second one as 20 hours, 12 minutes and 4 seconds.
+    ISO-8601-durations like 'P1DT2H' are accepted as well.
     """
-    def __call__(self, parser, namespace, values, option_string=None):
-        value = ' '.join(values) if isinstance(values, list) else values
-        kwords = ('weeks', 'days', 'hours', 'minutes', 'seconds')
+    VALUE_KIND = 'timedelta'
+    UNSUPPORTED = ('default_tz', 'relative', 'lock_format')
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super(ParseTimedelta, self).__init__(option_strings, dest, **kwargs)
         try:
-            key = [k for k in kwords if k.startswith(self.dest)][0]
+            self.key = [k for k in TIMEDELTA_KEYS if k.startswith(self.dest)][0]
         except IndexError:
-            key = 'days'
-        try:
-            timedelta = timeparser.parsetimedelta(value, key)
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (value, 'timedelta'))
-        else:
-            setattr(namespace, self.dest, timedelta)
+            self.key = 'days'
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        tokens = values if isinstance(values, list) else [values]
+        timedelta = try_parse_timedelta(tokens, self.key)
+        if timedelta is None:
+            return self.invalid(namespace, ' '.join(tokens), 'timedelta')
+        if self.as_ is not None:
+            timedelta = self.output('timedelta', timedelta)
+        setattr(namespace, self.dest, timedelta)
 
 
-class ParseDatetime(argparse.Action, TimeArgsMixin):
+class ParseDatetime(TimeArgsMixin, argparse.Action):
     """
     Action for :meth:`argparse.ArgumentParser.add_argument` to parse
     cmdline-parameters as :class:`datetime.datetime`.
@@ -186,18 +2892,20 @@ class ParseDatetime(argparse.Action, TimeArgsMixin):
         >>> parser.parse_args('--datetime 24/04/2013 23:22'.split()).datetime
         datetime.datetime(2013, 4, 24, 23, 22)
     """
+    VALUE_KIND = 'datetime'
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super(ParseDatetime, self).__init__(option_strings, dest, **kwargs)
+        self.plan = self.datetime_plan()
+
     def __call__(self, parser, namespace, values, option_string=None):
-        values = values if isinstance(values, list) else [values]
-        try:
-            if len(values) == 2: datetime = self.combine_datetime(*values)
-            else: datetime = timeparser.parsedatetime(' '.join(values))
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'datetime'))
-        else:
-            setattr(namespace, self.dest, datetime)
+        datetime = self.plan(values)
+        if datetime is None:
+            return self.invalid(namespace, values, 'datetime')
+        setattr(namespace, self.dest, datetime)
 
 
-class ParseTimeOrDatetime(argparse.Action, TimeArgsMixin):
+class ParseTimeOrDatetime(TimeArgsMixin, argparse.Action):
     """
     Action for :meth:`argparse.ArgumentParser.add_argument` to parse
     cmdline-parameters either as :class:`datetime.time` or :class:`datetime.datetime`..
@@ -220,18 +2928,19 @@ class ParseTimeOrDatetime(argparse.Action, TimeArgsMixin):
     """
     def __call__(self, parser, namespace, values, option_string=None):
         values = values if isinstance(values, list) else [values]
-        try:
-            obj = self.time_or_datetime(values)
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'time or datetime'))
-        else:
-            setattr(namespace, self.dest, obj)
+        obj = self.time_or_datetime(values)
+        if obj is None:
+            return self.invalid(namespace, values, 'time or datetime')
+        setattr(namespace, self.dest, obj)
 
 
-class AppendTime(argparse.Action, TimeArgsMixin):
+class AppendTime(TimeArgsMixin, argparse.Action):
     """
     Like :class:`ParseTime` with support for multiple use of arguments.
 
+    :keyword bool each:     Parse each of multiple values (s. *nargs*)
+                            separately instead of joining them.
+
     usage:
         >>> import argparse
         >>> import timeparse
@@ -244,20 +2953,36 @@ class AppendTime(argparse.Action, TimeArgsMixin):
         >>> parser.parse_args('--time 23:20:33 --time 22:20'.split()).time
         [datetime.time(23, 20, 33), datetime.time(22, 20)]
     """
+    KIND = 'time'
+    UNSUPPORTED = ('default_tz',)
+
+    def __init__(self, option_strings, dest, each=False, **kwargs):
+        self.each = each
+        super(AppendTime, self).__init__(option_strings, dest, **kwargs)
+
     def __call__(self, parser, namespace, values, option_string=None):
+        if self.each and isinstance(values, list):
+            times = self.parse_each('time', values)
+            if times is None:
+                return self.invalid(namespace, values, 'time')
+            return self.extend(namespace, times, values)
+        time = self.convert(values)
+        if time is None:
+            return self.invalid(namespace, values, 'time')
+        return self.append(namespace, time, values)
+
+    def convert(self, values):
         value = ' '.join(values) if isinstance(values, list) else values
-        try:
-            time = timeparser.parsetime(value)
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'time'))
-        else:
-            self.append(namespace, time)
+        return self.try_parse('time', value)
 
 
-class AppendDaytime(argparse.Action, TimeArgsMixin):
+class AppendDaytime(TimeArgsMixin, argparse.Action):
     """
     Like :class:`ParseDaytime` with support for multiple use of arguments.
 
+    :keyword bool each:     Parse each of multiple values (s. *nargs*)
+                            separately instead of joining them.
+
     usage:
         >>> import argparse
         >>> import timeparse
@@ -270,20 +2995,36 @@ class AppendDaytime(argparse.Action, TimeArgsMixin):
         >>> parser.parse_args('--daytime 23:20:33 --daytime 22:20'.split()).daytime
         [Daytime(23, 20, 33), Daytime(22, 20)]
     """
+    KIND = 'daytime'
+    UNSUPPORTED = ('default_tz',)
+
+    def __init__(self, option_strings, dest, each=False, **kwargs):
+        self.each = each
+        super(AppendDaytime, self).__init__(option_strings, dest, **kwargs)
+
     def __call__(self, parser, namespace, values, option_string=None):
+        if self.each and isinstance(values, list):
+            daytimes = self.parse_each('daytime', values)
+            if daytimes is None:
+                return self.invalid(namespace, values, 'daytime')
+            return self.extend(namespace, daytimes, values)
+        daytime = self.convert(values)
+        if daytime is None:
+            return self.invalid(namespace, values, 'daytime')
+        return self.append(namespace, daytime, values)
+
+    def convert(self, values):
         value = ' '.join(values) if isinstance(values, list) else values
-        try:
-            daytime = Daytime.fromtime(timeparser.parsetime(values))
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'daytime'))
-        else:
-            self.append(namespace, daytime)
+        return self.try_parse('daytime', value)
 
 
-class AppendDate(argparse.Action, TimeArgsMixin):
+class AppendDate(TimeArgsMixin, argparse.Action):
     """
     Like :class:`ParseDate` with support for multiple use of arguments.
 
+    :keyword bool each:     Parse each of multiple values (s. *nargs*)
+                            separately instead of joining them.
+
     usage:
         >>> import argparse
         >>> import timeparse
@@ -296,57 +3037,490 @@ class AppendDate(argparse.Action, TimeArgsMixin):
         >>> parser.parse_args('--date 23.4.13 --date 24.4.13'.split()).date
         [datetime.date(2013, 4, 23), datetime.date(2013, 4, 24)]
     """
+    KIND = 'date'
+    UNSUPPORTED = ('default_tz',)
+
+    def __init__(self, option_strings, dest, each=False, **kwargs):
+        self.each = each
+        super(AppendDate, self).__init__(option_strings, dest, **kwargs)
+
     def __call__(self, parser, namespace, values, option_string=None):
+        if self.each and isinstance(values, list):
+            dates = self.parse_each('date', values)
+            if dates is None:
+                return self.invalid(namespace, values, 'date')
+            return self.extend(namespace, dates, values)
+        date = self.convert(values)
+        if date is None:
+            return self.invalid(namespace, values, 'date')
+        return self.append(namespace, date, values)
+
+    def convert(self, values):
         value = ' '.join(values) if isinstance(values, list) else values
-        try:
-            date = timeparser.parsedate(value)
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'date'))
-        else:
-            self.append(namespace, date)
+        return self.try_parse('date', value)
 
 
-class AppendTimedelta(argparse.Action, TimeArgsMixin):
+class AppendTimedelta(TimeArgsMixin, argparse.Action):
     """
     Like :class:`ParseTimedelta` with support for multiple use of arguments.
+    Unflagged values start with weeks.
     """
+    KIND = 'timedelta'
+    UNSUPPORTED = ('default_tz', 'relative', 'lock_format')
+    key = 'weeks'
+
     def __call__(self, parser, namespace, values, option_string=None):
-        value = ' '.join(values) if isinstance(values, list) else values
-        try:
-            timedelta = timeparser.parsetimedelta(value)
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'timedelta'))
-        else:
-            self.append(namespace, timedelta)
+        timedelta = self.convert(values)
+        if timedelta is None:
+            return self.invalid(namespace, values, 'timedelta')
+        return self.append(namespace, timedelta, values)
+
+    def convert(self, values):
+        tokens = values if isinstance(values, list) else [values]
+        timedelta = try_parse_timedelta(tokens, self.key)
+        if timedelta is None or self.as_ is None:
+            return timedelta
+        return self.output('timedelta', timedelta)
 
 
-class AppendDatetime(argparse.Action, TimeArgsMixin):
+class AppendDatetime(TimeArgsMixin, argparse.Action):
     """
     Like :class:`ParseDatetime` with support for multiple use of arguments.
     """
+    KIND = 'datetime'
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super(AppendDatetime, self).__init__(option_strings, dest, **kwargs)
+        self.plan = self.datetime_plan()
+
     def __call__(self, parser, namespace, values, option_string=None):
-        values = values if isinstance(values, list) else [values]
-        try:
-            if len(values) == 2: datetime = self.combine_datetime(*values)
-            else: datetime = timeparser.parsedatetime(' '.join(values))
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'datetime'))
-        else:
-            self.append(namespace, datetime)
+        datetime = self.convert(values)
+        if datetime is None:
+            return self.invalid(namespace, values, 'datetime')
+        return self.append(namespace, datetime, values)
 
+    def convert(self, values):
+        return self.plan(values)
 
-class AppendTimeOrDatetime(argparse.Action, TimeArgsMixin):
+
+class AppendTimeOrDatetime(TimeArgsMixin, argparse.Action):
     """
     Like :class:`ParseTimeOrDatetime` with support for multiple use of arguments.
     """
     def __call__(self, parser, namespace, values, option_string=None):
-        values = values if isinstance(values, list) else [values]
+        obj = self.convert(values)
+        if obj is None:
+            values = values if isinstance(values, list) else [values]
+            return self.invalid(namespace, values, 'time or datetime')
+        return self.append(namespace, obj, values)
+
+    def convert(self, values):
+        return self.time_or_datetime(values if isinstance(values, list) else [values])
+
+
+class ParseDatetimeRange(TimeArgsMixin, argparse.Action):
+    """
+    Action for :meth:`argparse.ArgumentParser.add_argument` to parse
+    'START .. STOP [every STEP]' as :class:`DatetimeRange`. START and STOP are
+    parsed like :class:`ParseDatetime`, STEP like :class:`ParseTimedelta`
+    with days for unflagged values.
+
+    :keyword step:      Default step (one day).
+
+    usage:
+        >>> import argparse
+        >>> import timeparse
+
+        >>> parser = argparse.ArgumentParser(prog='PROG')
+        >>> parser.add_argument(
+        ... '--window',
+        ... nargs='+',
+        ... action=timeparse.ParseDatetimeRange
+        ... )
+        >>> window = parser.parse_args(
+        ... '--window 22.4.13 08:00 .. 23.4.13 18:00 every 15m'.split()).window
+        >>> len(window)
+        137
+    """
+    key = 'days'
+
+    def __init__(self, option_strings, dest, step=datetime.timedelta(days=1), **kwargs):
+        self.step = step
+        super(ParseDatetimeRange, self).__init__(option_strings, dest, **kwargs)
+
+    def datetime(self, tokens):
+        datetime = self.localize(self.parse_datetime(tokens))
+        if datetime is None:
+            raise ValueError("couldn't parse '%s' as datetime" % ' '.join(tokens))
+        return datetime
+
+    def timedelta(self, tokens):
+        return parse_timedelta(tokens, self.key)
+
+    def parse_range(self, tokens):
+        if 'every' in tokens:
+            index = tokens.index('every')
+            tokens, step = tokens[:index], self.timedelta(tokens[index + 1:])
+        else:
+            step = self.step
+        if tokens.count('..') != 1:
+            raise ValueError("'%s' is no range" % ' '.join(tokens))
+        index = tokens.index('..')
+        return DatetimeRange(self.datetime(tokens[:index]), self.datetime(tokens[index + 1:]), step)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        tokens = values.split() if isinstance(values, str) else list(values)
         try:
-            obj = self.time_or_datetime(values)
-        except ValueError:
-            raise ArgumentError(self, self.ERR % (values, 'time or datetime'))
+            datetime_range = self.parse_range(tokens)
+        except (ValueError, TypeError):
+            # TypeError: naive and aware datetimes mixed
+            return self.invalid(namespace, values, 'datetime range')
+        setattr(namespace, self.dest, datetime_range)
+
+
+class ParseRecurrence(ParseDatetimeRange):
+    """
+    Like :class:`ParseDatetimeRange` for 'START every STEP [times N]'. Without
+    a number of times the :class:`DatetimeRange` is unbounded.
+
+    usage:
+        >>> import argparse
+        >>> import timeparse
+
+        >>> parser = argparse.ArgumentParser(prog='PROG')
+        >>> parser.add_argument(
+        ... '--backup',
+        ... nargs='+',
+        ... action=timeparse.ParseRecurrence
+        ... )
+        >>> backup = parser.parse_args('--backup 22.4.13 03:00 every 1d times 7'.split()).backup
+        >>> backup[-1]
+        datetime.datetime(2013, 4, 28, 3, 0)
+    """
+    def parse_range(self, tokens):
+        if tokens.count('every') != 1:
+            raise ValueError("'%s' is no recurrence" % ' '.join(tokens))
+        index = tokens.index('every')
+        start, tokens = self.datetime(tokens[:index]), tokens[index + 1:]
+        if 'times' in tokens:
+            index = tokens.index('times')
+            if len(tokens) != index + 2:
+                raise ValueError("'%s' is no recurrence" % ' '.join(tokens))
+            step, times = self.timedelta(tokens[:index]), int(tokens[index + 1])
+            return DatetimeRange(start, start + (times - 1) * step, step)
+        return DatetimeRange(start, None, self.timedelta(tokens))
+
+
+class ParseTimeStream(TimeArgsMixin, argparse.Action):
+    """
+    Action for :meth:`argparse.ArgumentParser.add_argument` to parse the lines
+    of a file ('@path') or of stdin ('@-') as :class:`datetime.time`.
+
+    The value is a :class:`TimeStream` that parses the lines while it is
+    iterated, so even huge files are never loaded as a whole. The file is
+    closed once it is read (s. :meth:`TimeStream.close`). The keyword
+    *errors* selects the policy for bad lines (s. :func:`iter_parse`).
+    A value without a leading '@' is treated as a file with one line.
+
+    usage:
+        >>> import argparse
+        >>> import timeparse
+
+        >>> parser = argparse.ArgumentParser(prog='PROG')
+        >>> parser.add_argument(
+        ... '--times',
+        ... action=timeparse.ParseTimeStream,
+        ... errors='skip'
+        ... )
+        >>> with open('times.txt', 'w') as f:
+        ...     print('23:22\nfoo\n08:00', file=f)
+        >>> times = parser.parse_args('--times @times.txt'.split()).times
+        >>> for time in times: print(time)
+        23:22:00
+        08:00:00
+
+    Mind that '@' must not be one of the *fromfile_prefix_chars* of the parser.
+    The options of the Append*-actions (*container*, *order*), *as_*,
+    *default_tz*, *relative* and *lock_format* are not supported.
+    """
+    KIND = 'time'
+    UNSUPPORTED = ('container', 'order', 'as_', 'default_tz', 'relative',
+                   'lock_format')
+
+    def __init__(self, option_strings, dest, errors='raise', **kwargs):
+        if errors not in ERRORS:
+            raise ValueError("errors must be one of %s" % ', '.join(ERRORS))
+        self.errors = errors
+        super(ParseTimeStream, self).__init__(option_strings, dest, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        value = ' '.join(values) if isinstance(values, list) else values
+        owned = False
+        if value == '@-':
+            lines = sys.stdin
+        elif value.startswith('@'):
+            try:
+                lines, owned = open(value[1:]), True
+            except (IOError, OSError) as err:
+                raise ArgumentError(self, "can't open '%s': %s" % (value[1:], err))
         else:
-            self.append(namespace, obj)
+            lines = [value]
+        stream = TimeStream(self.KIND, lines, self.errors, self.config, owned)
+        setattr(namespace, self.dest, stream)
+
+
+class ParseDateStream(ParseTimeStream):
+    """
+    Like :class:`ParseTimeStream` for :class:`datetime.date`.
+    """
+    KIND = 'date'
+
+
+class ParseDatetimeStream(ParseTimeStream):
+    """
+    Like :class:`ParseTimeStream` for :class:`datetime.datetime`.
+    """
+    KIND = 'datetime'
+
+
+JSON_SUFFIXES = ('.json', '.ndjson', '.jsonl')
+"""Suffixes of argument-files read by :meth:`TimeArgumentParser.read_json_args`."""
+
+
+def _json_args(value):
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    elif isinstance(value, dict):
+        args = list()
+        for option, values in value.items():
+            for item in values if isinstance(values, list) else [values]:
+                if item is True:
+                    args.append(option)
+                elif item is not False and item is not None:
+                    args.append(option)
+                    args.extend(_json_args(item) if isinstance(item, list) else [str(item)])
+        return args
+    else:
+        return [str(value)]
+
+
+class TimeArgumentParser(argparse.ArgumentParser):
+    """
+    :class:`argparse.ArgumentParser` for large command-lines and argument-files
+    with many repeated Append*-actions.
+
+    All occurrences of each Append*-action are taken out of the arguments
+    before argparse sees them and are handled in one batch per action
+    (s. :meth:`TimeArgsMixin.batch`), which parses each distinct value only
+    once. The namespace is the same as without batching. Actions, for which
+    that can't be guaranteed, aren't batched: actions that are required, in
+    validate_only-mode, in a mutually exclusive group, take a variable number
+    of values, have a *type* or *choices* or share their dest with another
+    action, occurrences following other arguments and followed by a
+    positional argument, and all actions if a positional argument takes a
+    variable number of values or the arguments contain '--'. Mind that an
+    invalid batched value is reported after the other arguments have been
+    parsed.
+
+    Argument-files (s. *fromfile_prefix_chars*) are expanded before parsing
+    (s. :meth:`expand_arg_files`); those ending with one of
+    :data:`JSON_SUFFIXES` are read as JSON or as NDJSON with one JSON-value
+    per line (s. :meth:`read_json_args`).
+
+    :keyword config:    :class:`TimeConfig` passed to all actions of timeparse
+                        that are added without one.
+
+    usage:
+        >>> import timeparse
+
+        >>> parser = timeparse.TimeArgumentParser(prog='PROG', fromfile_prefix_chars='@')
+        >>> parser.add_argument(
+        ... '--at',
+        ... action=timeparse.AppendDaytime
+        ... )
+        >>> parser.parse_args('--at 08:00 --at 23:30 --at 08:00'.split()).at
+        [Daytime(8, 0), Daytime(23, 30), Daytime(8, 0)]
+    """
+    def __init__(self, *args, config=None, **kwargs):
+        self.config = config
+        super(TimeArgumentParser, self).__init__(*args, **kwargs)
+
+    def add_argument(self, *args, **kwargs):
+        action = kwargs.get('action')
+        if (self.config is not None and isinstance(action, type)
+                and issubclass(action, TimeArgsMixin)):
+            kwargs.setdefault('config', self.config)
+        return super(TimeArgumentParser, self).add_argument(*args, **kwargs)
+
+    def batchable(self):
+        """
+        Return the actions to be batched by their option-strings.
+        """
+        for action in self._actions:
+            if action.nargs == argparse.REMAINDER or not action.option_strings and not (
+                    action.nargs is None or isinstance(action.nargs, int)):
+                return dict()
+        exclusive = set(action for group in self._mutually_exclusive_groups
+                        for action in group._group_actions)
+        dests = Counter(action.dest for action in self._actions)
+        return dict(
+            (option, action) for action in self._actions
+            if hasattr(action, 'convert') and not action.required
+            and not action.validate_only and action not in exclusive
+            and action.type is None and action.choices is None
+            and dests[action.dest] == 1
+            and (action.nargs is None
+                 or isinstance(action.nargs, int) and not getattr(action, 'each', False))
+            for option in action.option_strings
+            )
+
+    def split_batches(self, args, actions):
+        """
+        Take the occurrences of *actions* (s. :meth:`batchable`) out of
+        *args*. Occurrences followed by a positional argument stay unless
+        they are at the start, since argparse would take that argument for a
+        value of the preceding option or group it with the preceding
+        positional arguments without the occurrence between them.
+
+        :returns:   Tuple of the remaining args and a dict of the values of
+                    all occurrences by action.
+        """
+        while True:
+            rest, batches, unbatchable = list(), dict(), set()
+            i = 0
+            while i < len(args):
+                arg = args[i]
+                action = actions.get(arg)
+                explicit = None
+                if action is None and '=' in arg:
+                    option, explicit = arg.split('=', 1)
+                    action = actions.get(option)
+                if action is None:
+                    if arg[:1] in self.prefix_chars:
+                        # abbreviations and values attached to short options
+                        unbatchable.update(self.ambiguous(arg, actions))
+                    rest.append(arg)
+                    i += 1
+                    continue
+                if explicit is not None:
+                    values = explicit if action.nargs is None else None
+                    end = i + 1
+                else:
+                    end = i + 1 + (1 if action.nargs is None else action.nargs)
+                    values = args[i + 1:end]
+                    if len(values) < end - i - 1 or any(
+                            v[:1] in self.prefix_chars for v in values):
+                        values = None
+                    elif action.nargs is None:
+                        values = values[0]
+                if values is None or rest and end < len(args) and self.positional(args[end]):
+                    unbatchable.add(action)
+                    rest.append(arg)
+                    i += 1
+                    continue
+                batches.setdefault(action, list()).append(values)
+                i = end
+            if not unbatchable:
+                return rest, batches
+            actions = dict((o, a) for o, a in actions.items() if a not in unbatchable)
+
+    def positional(self, arg):
+        """
+        Return whether argparse might take *arg* for a positional argument
+        or the value of an option.
+        """
+        return (len(arg) < 2 or arg[0] not in self.prefix_chars or ' ' in arg
+                or _RE.negative.match(arg) is not None)
+
+    def ambiguous(self, arg, actions):
+        """
+        Return the *actions* argparse might take *arg* for although it isn't
+        one of their option-strings.
+        """
+        name = arg.split('=', 1)[0]
+        if name in self._option_string_actions:
+            return set()
+        return set(action for option, action in actions.items()
+                   if option.startswith(name) or len(option) == 2
+                   and arg[1:2] not in self.prefix_chars and option[1] in arg[1:])
+
+    def parse_known_args(self, args=None, namespace=None):
+        depth = getattr(_anchor, 'depth', 0)
+        if not depth:
+            # relative expressions refer to the moment of this parse, even if
+            # the namespace is reused (but not restarted by subparsers)
+            reset_anchor()
+        _anchor.depth = depth + 1
+        try:
+            return self.parse_batched(args, namespace)
+        finally:
+            _anchor.depth = depth
+
+    def parse_batched(self, args=None, namespace=None):
+        """
+        Parse *args* like :meth:`parse_known_args` with the batchable actions
+        (s. :meth:`batchable`) handled in batches.
+        """
+        args = sys.argv[1:] if args is None else list(args)
+        if self.fromfile_prefix_chars is not None:
+            args = self.expand_arg_files(args)
+        actions = self.batchable()
+        if not actions or '--' in args:
+            # argparse groups '--' with the arguments around it
+            return super(TimeArgumentParser, self).parse_known_args(args, namespace)
+        args, batches = self.split_batches(args, actions)
+        namespace, extras = super(TimeArgumentParser, self).parse_known_args(args, namespace)
+        try:
+            for action, occurrences in batches.items():
+                action.batch(self, namespace, occurrences)
+        except ArgumentError as err:
+            if not getattr(self, 'exit_on_error', True):
+                raise
+            self.error(str(err))
+        return namespace, extras
+
+    def read_json_args(self, path):
+        """
+        Return the arguments of the JSON- or NDJSON-file *path*. A JSON-list
+        holds the arguments themselves, a JSON-object maps option-strings to
+        their value, a list of values for repeated options, or true for
+        flags, and any other JSON-value is a single argument.
 
+        usage:
+            {"--at": ["08:00", "23:30"], "--verbose": true}
+        """
+        import json
+        with open(path) as f:
+            if path.endswith('.json'):
+                return _json_args(json.load(f))
+            return [arg for line in f if line.strip() for arg in _json_args(json.loads(line))]
 
+    def read_text_args(self, path):
+        """
+        Return the arguments of the text-file *path* like argparse reads
+        them, with one argument per line (s.
+        :meth:`argparse.ArgumentParser.convert_arg_line_to_args`).
+        """
+        with open(path) as f:
+            return [arg for line in f.read().splitlines()
+                    for arg in self.convert_arg_line_to_args(line)]
 
+    def expand_arg_files(self, args):
+        """
+        Replace the argument-files in *args* (s. *fromfile_prefix_chars*) by
+        the arguments they contain, recursively.
+        """
+        expanded = list()
+        for arg in args:
+            if not arg or arg[0] not in self.fromfile_prefix_chars:
+                expanded.append(arg)
+                continue
+            try:
+                if arg.endswith(JSON_SUFFIXES):
+                    file_args = self.read_json_args(arg[1:])
+                else:
+                    file_args = self.read_text_args(arg[1:])
+            except (OSError, ValueError) as err:
+                self.error(str(err))
+            expanded.extend(self.expand_arg_files(file_args))
+        return expanded